@@ -1,50 +1,206 @@
-import wireviz
+#!/usr/bin/env python3
 import os
+import re
+import sys
+import glob
+import json
+import hashlib
+import argparse
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+
+import wireviz
 
-demos     = 0 # 2
-examples  = 0 # 7
-tutorials = 7 # 7
+base_dir     = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+examples_dir = os.path.join(base_dir, 'examples')
+tutorial_dir = os.path.join(base_dir, 'tutorial')
 
-if demos:
-    for i in range(1,demos+1):
-        fn = '../examples/demo{:02d}.yml'.format(i)
-        print(fn)
-        wireviz.parse(fn, gen_bom=True)
+default_inputs = [os.path.join(examples_dir, 'demo*.yml'),
+                  os.path.join(examples_dir, 'ex*.yml'),
+                  os.path.join(tutorial_dir, 'tutorial*.yml')]
 
-if examples:
-    with open(os.path.abspath('../examples/readme.md'), 'w') as file:
-        file.write('# Example gallery\n')
-        for i in range(1,examples+1):
-            fn = '../examples/ex{:02d}.yml'.format(i)
-            print(fn)
-            wireviz.parse(fn, gen_bom=True)
+def collect_files(inputs):
+    # inputs can be files, directories (all *.yml inside) or glob patterns
+    files = []
+    for i in inputs:
+        if os.path.isdir(i):
+            found = sorted(glob.glob(os.path.join(i, '*.yml')))
+        elif os.path.isfile(i):
+            found = [i]
+        else:
+            found = sorted(glob.glob(i))
+            if not found:
+                raise Exception('No input files found for {}'.format(i))
+        files.extend(os.path.abspath(f) for f in found)
+    return list(dict.fromkeys(files)) # remove duplicates, keep order
+
+manifest_name = '.wireviz-build.json'
+
+# options passed to wireviz.parse() by build(); recorded in the manifest
+build_options = {'format': ['png', 'svg'], 'gen_bom': True}
+
+output_extensions = ['gv', 'png', 'svg', 'bom.tsv', 'html']
+
+def input_hash(fn):
+    with open(fn, 'rb') as file:
+        return hashlib.sha256(file.read()).hexdigest()
+
+def load_manifest(directory):
+    try:
+        with open(os.path.join(directory, manifest_name), 'r') as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return {}
+
+def save_manifest(directory, manifest):
+    with open(os.path.join(directory, manifest_name), 'w') as file:
+        json.dump(manifest, file, indent=2, sort_keys=True)
+        file.write('\n')
+
+def manifest_entry(fn):
+    pre, ext = os.path.splitext(os.path.basename(fn))
+    return {'input': input_hash(fn),
+            'version': wireviz.build_version(),
+            'options': build_options,
+            'outputs': ['{}.{}'.format(pre, e) for e in output_extensions]}
+
+def up_to_date(fn, entry, manifest):
+    old = manifest.get(os.path.basename(fn))
+    if old != entry:
+        return False
+    directory = os.path.dirname(fn)
+    return all(os.path.exists(os.path.join(directory, o)) for o in entry['outputs'])
+
+def build(fn):
+    # runs in a worker process; errors are returned instead of raised so one bad file does not abort the batch
+    try:
+        wireviz.parse(fn, **build_options)
+    except Exception:
+        return fn, traceback.format_exc()
+    return fn, None
+
+def build_group(fns):
+    # several files through a single dot process; if that fails, they are built one by one
+    # so that the error is reported for the right file
+    if len(fns) == 1:
+        return [build(fns[0])]
+    try:
+        wireviz.parse_batch(fns, **build_options)
+    except Exception:
+        return [build(fn) for fn in fns]
+    return [(fn, None) for fn in fns]
+
+def gallery_files(directory, prefix):
+    # (number, basename without extension) of all numbered input files, e.g. (3, 'ex03')
+    files = []
+    for fn in glob.glob(os.path.join(directory, '{}*.yml'.format(prefix))):
+        name = os.path.splitext(os.path.basename(fn))[0]
+        m = re.fullmatch(r'{}(\d+)'.format(prefix), name)
+        if m:
+            files.append((int(m.group(1)), name))
+    return sorted(files)
 
+def write_example_gallery(directory):
+    with open(os.path.join(directory, 'readme.md'), 'w') as file:
+        file.write('# Example gallery\n')
+        for i, name in gallery_files(directory, 'ex'):
             file.write('## Example {:02d}\n'.format(i))
-            file.write('![](ex{:02d}.png)\n\n'.format(i))
-            file.write('[Source](ex{:02d}.yml) - [Bill of Materials](ex{:02d}.bom.tsv)\n\n\n'.format(i,i))
+            file.write('![]({}.png)\n\n'.format(name))
+            file.write('[Source]({name}.yml) - [Bill of Materials]({name}.bom.tsv)\n\n\n'.format(name=name))
 
-if tutorials:
-    with open(os.path.abspath('../tutorial/readme.md'), 'w') as file:
+def write_tutorial_gallery(directory):
+    with open(os.path.join(directory, 'readme.md'), 'w') as file:
         file.write('# WireViz Tutorial\n')
-        for i in range(1,tutorials+1):
-            fn = '../tutorial/tutorial{:02d}.yml'.format(i)
-            print(fn)
-            wireviz.parse(fn, gen_bom=True)
-
-            with open(os.path.abspath('../tutorial/tutorial{:02d}.md'.format(i)), 'r') as info:
+        for i, name in gallery_files(directory, 'tutorial'):
+            with open(os.path.join(directory, '{}.md'.format(name)), 'r') as info:
                 for line in info:
                     file.write(line.replace('## ', '## {} - '.format(i)))
-            file.write('\n[Source](tutorial{:02d}.yml):\n\n'.format(i))
+            file.write('\n[Source]({}.yml):\n\n'.format(name))
 
-            with open(os.path.abspath('../tutorial/tutorial{:02d}.yml'.format(i)), 'r') as src:
+            with open(os.path.join(directory, '{}.yml'.format(name)), 'r') as src:
                 file.write('```yaml\n')
                 for line in src:
                     file.write(line)
                 file.write('```\n')
             file.write('\n')
 
-            file.write('\nOutput:\n\n'.format(i))
+            file.write('\nOutput:\n\n')
+
+            file.write('![]({}.png)\n\n'.format(name))
+
+            file.write('[Bill of Materials]({}.bom.tsv)\n\n\n'.format(name))
+
+galleries = {examples_dir: write_example_gallery,
+             tutorial_dir: write_tutorial_gallery}
+
+def run(inputs, jobs=1, force=False, single_dot=False):
+    jobs = max(1, jobs)
+    files = collect_files(inputs)
+    directories = list(dict.fromkeys(os.path.dirname(fn) for fn in files))
+
+    # skip files whose input, tool version and options match the manifest of their directory
+    manifests = {d: load_manifest(d) for d in directories}
+    entries = {fn: manifest_entry(fn) for fn in files}
+    todo = []
+    for fn in files:
+        if not force and up_to_date(fn, entries[fn], manifests[os.path.dirname(fn)]):
+            print('{} (up to date)'.format(fn))
+        else:
+            todo.append(fn)
+
+    if single_dot:
+        # one dot process per worker instead of one per file, for many small diagrams where startup dominates
+        groups = [todo[i::jobs] for i in range(min(jobs, len(todo)))]
+    else:
+        groups = [[fn] for fn in todo]
+
+    results = []
+    if jobs > 1 and len(groups) > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            for group_results in executor.map(build_group, groups):
+                for fn, error in group_results:
+                    print(fn)
+                    results.append((fn, error))
+    else:
+        for group in groups:
+            for fn, error in build_group(group):
+                print(fn)
+                results.append((fn, error))
+
+    errors = [(fn, error) for fn, error in results if error is not None]
+
+    # manifests are only written by this process, after all workers are done
+    for fn, error in results:
+        manifest = manifests[os.path.dirname(fn)]
+        if error is None:
+            manifest[os.path.basename(fn)] = entries[fn]
+        else:
+            manifest.pop(os.path.basename(fn), None)
+    if results:
+        for directory in directories:
+            save_manifest(directory, manifests[directory])
+
+    # galleries are only written once all diagrams exist
+    for directory in directories:
+        if directory in galleries:
+            galleries[directory](directory)
+
+    return errors
+
+if __name__ == '__main__':
+    ap = argparse.ArgumentParser(description='Build several WireViz files at once')
+    ap.add_argument('inputs', nargs='*', help='YAML files, directories or glob patterns (default: all demos, examples and tutorials)')
+    ap.add_argument('-j', '--jobs', type=int, default=os.cpu_count() or 1, help='number of parallel worker processes')
+    ap.add_argument('-f', '--force', action='store_true', help='rebuild all files, even if they are up to date')
+    ap.add_argument('-s', '--single-dot', action='store_true', help='render all diagrams of a worker with a single dot process')
+    args = ap.parse_args()
+    if args.jobs < 1:
+        ap.error('--jobs must be at least 1')
 
-            file.write('![](tutorial{:02d}.png)\n\n'.format(i))
+    errors = run(args.inputs or default_inputs, jobs=args.jobs, force=args.force, single_dot=args.single_dot)
 
-            file.write('[Bill of Materials](tutorial{:02d}.bom.tsv)\n\n\n'.format(i))
+    for fn, error in errors:
+        print('\nError in {}:\n{}'.format(fn, error), file=sys.stderr)
+    if errors:
+        print('{} file(s) failed'.format(len(errors)), file=sys.stderr)
+        sys.exit(1)
@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+import time
+import argparse
+
+import wireviz
+
+# Benchmark of the BOM grouping: a synthetic harness with many connectors of a
+# few hundred types, some cables and many small bundles of varying gauge, length
+# and colors. Only the harness items matter for the BOM, no connections are made.
+
+def make_harness(connectors, wires, bundle_size, types):
+    colors = ['BK', 'RD', 'GN', 'BU', 'YE', 'WH', 'GY', 'PK', 'VT', 'OG']
+    gauges = ['0.25 mm2', '0.5 mm2', '0.75 mm2', '1 mm2', '22 AWG', '24 AWG']
+    h = wireviz.Harness()
+    for i in range(connectors):
+        t = i % types
+        h.add_connector('X{}'.format(i), type='Type {}'.format(t % 40), subtype='Sub {}'.format(t // 40), pincount=1 + t % 24,
+                        part_number='PN-{}'.format(t) if t % 3 else None)
+    for i in range(connectors // 100):
+        h.add_cable('C{}'.format(i), wirecount=1 + i % 12, gauge=gauges[i % len(gauges)], length=0.5 + i % 7, shield=i % 2 == 0)
+    for i in range(wires // bundle_size):
+        h.add_cable('W{}'.format(i), category='bundle', gauge=gauges[i % len(gauges)], length=0.1 * (1 + i % 25),
+                    colors=[colors[(i + w) % len(colors)] for w in range(bundle_size)])
+    return h
+
+if __name__ == '__main__':
+    ap = argparse.ArgumentParser(description='Time BOM generation for a large synthetic harness')
+    ap.add_argument('-c', '--connectors', type=int, default=10000, help='number of connectors (default: 10000)')
+    ap.add_argument('-w', '--wires', type=int, default=50000, help='total number of bundle wires (default: 50000)')
+    ap.add_argument('-b', '--bundle-size', type=int, default=10, help='wires per bundle (default: 10)')
+    ap.add_argument('-t', '--types', type=int, default=400, help='number of distinct connector types (default: 400)')
+    ap.add_argument('-r', '--repeat', type=int, default=5, help='number of runs, the best is reported (default: 5)')
+    args = ap.parse_args()
+
+    h = make_harness(args.connectors, args.wires, args.bundle_size, args.types)
+    print('{} connectors, {} cables and bundles, {} bundle wires'.format(len(h.connectors), len(h.cables), args.wires))
+    for name, f in (('bom', h.bom), ('bom_list', h.bom_list)):
+        best = float('inf')
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            rows = f()
+            best = min(best, time.perf_counter() - start)
+        print('{:<9} {:8.3f} s   {} rows'.format(name, best, len(rows)))
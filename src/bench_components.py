@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+import wireviz
+from wv_profile import Profiler
+
+# Benchmark of --split-components: a synthetic harness of independent
+# connector -- cable -- connector chains is laid out as one graph and as one
+# graph per connected component. The layouts alone (dot -Tdot) are always
+# measured; the complete output (including gvpack and neato -n2) only if
+# gvpack is installed.
+
+def make_harness(components, wires):
+    colors = ['BK', 'RD', 'GN', 'BU', 'YE', 'WH']
+    d = {'connectors': {}, 'cables': {}, 'connections': []}
+    for i in range(components):
+        for side in 'AB':
+            d['connectors']['{}{}'.format(side, i)] = {'pinout': ['P{}'.format(p) for p in range(1, wires + 1)]}
+        d['cables']['W{}'.format(i)] = {'wirecount': wires, 'colors': [colors[w % len(colors)] for w in range(wires)]}
+        pins = '1-{}'.format(wires)
+        d['connections'].append([{'A{}'.format(i): pins}, {'W{}'.format(i): pins}, {'B{}'.format(i): pins}])
+    return wireviz.harness_from_dict(d)
+
+def layouts(h, jobs):
+    # wall time of laying out the whole graph, and of laying out every component in parallel
+    from graphviz import backend
+    whole = h.create_graph()
+    start = time.perf_counter()
+    backend.pipe('dot', 'dot', whole.source.encode(whole.encoding))
+    whole_wall = time.perf_counter() - start
+
+    h.assign_port_sides()
+    graphs = [h.create_graph(None, *h.component_items(names)) for names in h.components()]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        list(executor.map(lambda g: backend.pipe('dot', 'dot', g.source.encode(g.encoding)), graphs))
+    return whole_wall, time.perf_counter() - start
+
+def output(h, directory, split, jobs, formats):
+    # wall time of the 'dot' stage of Harness.output()
+    profiler = Profiler()
+    h.output(os.path.join(directory, 'bench'), directory=directory, format=formats, gen_bom=False, html=False, gv=False,
+             split_components=split, jobs=jobs, layout='full', profiler=profiler)
+    return next(s['wall'] for s in profiler.stages if s['name'] == 'dot')
+
+if __name__ == '__main__':
+    ap = argparse.ArgumentParser(description='Compare laying out a harness as one graph and per connected component')
+    ap.add_argument('-n', '--components', type=int, default=40, help='number of independent components (default: 40)')
+    ap.add_argument('-w', '--wires', type=int, default=12, help='wires per cable (default: 12)')
+    ap.add_argument('-j', '--jobs', type=int, default=os.cpu_count() or 1, help='parallel dot processes (default: number of CPUs)')
+    ap.add_argument('--formats', default='svg', help='comma-separated output formats (default: svg)')
+    args = ap.parse_args()
+
+    if shutil.which('dot') is None:
+        sys.exit('dot not found, install Graphviz')
+    h = make_harness(args.components, args.wires)
+    stats = h.graph_stats()
+    print('{} components, {nodes} nodes, {edges} edges, {} jobs'.format(args.components, args.jobs, **stats))
+
+    whole, parts = layouts(h, args.jobs)
+    print('layout (dot -Tdot)   whole: {:8.3f} s   components: {:8.3f} s   speedup: {:.1f}x'.format(whole, parts, whole / parts))
+
+    if shutil.which('gvpack') is None:
+        print('gvpack not found, complete output not measured')
+    else:
+        formats = [f.strip() for f in args.formats.split(',') if f.strip()]
+        with tempfile.TemporaryDirectory() as directory:
+            whole = output(h, directory, False, args.jobs, formats)
+            parts = output(h, directory, True, args.jobs, formats)
+        print('output ({})   whole: {:8.3f} s   components: {:8.3f} s   speedup: {:.1f}x'.format(','.join(formats), whole, parts, whole / parts))
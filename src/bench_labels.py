@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+import time
+import argparse
+
+import wireviz
+from wv_labels import connector_label, cable_label
+
+# Micro-benchmark of the label builders (wv_labels): a connector with N pins and
+# a cable with N wires, connected to it on both sides, are labeled for growing N.
+# Linear scaling shows as a roughly constant time per wire.
+
+def make_items(wires):
+    colors = ['BK', 'RD', 'GN', 'BU', 'YE', 'WH']
+    connector = wireviz.Connector('X1', pinout=['PIN{}'.format(p) for p in range(1, wires + 1)])
+    connector.ports_left = connector.ports_right = True
+    cable = wireviz.Cable('W1', wirecount=wires, colors=colors, gauge='0.25 mm2', length=1, shield=True)
+    wire_ins = {w: 'X1:{}'.format(w) for w in range(1, wires + 1)}
+    wire_outs = {w: 'X2:{}'.format(w) for w in range(1, wires + 1)}
+    return connector, cable, wire_ins, wire_outs
+
+def per_call(f, min_time):
+    # average wall time of f() over enough calls to last at least min_time seconds
+    calls = 0
+    start = time.perf_counter()
+    while True:
+        f()
+        calls += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            return elapsed / calls
+
+if __name__ == '__main__':
+    ap = argparse.ArgumentParser(description='Time connector and cable label generation for growing wire counts')
+    ap.add_argument('-w', '--wires', default='8,16,32,64,128,256,512,1024', help='comma-separated wire counts (default: 8 to 1024)')
+    ap.add_argument('-t', '--min-time', type=float, default=0.2, help='minimum time per measurement in seconds (default: 0.2)')
+    args = ap.parse_args()
+
+    print('{:>6} {:>14} {:>14} {:>14} {:>14}'.format('wires', 'connector us', 'per pin us', 'cable us', 'per wire us'))
+    for wires in [int(w) for w in args.wires.split(',')]:
+        connector, cable, wire_ins, wire_outs = make_items(wires)
+        t_connector = per_call(lambda: connector_label(connector), args.min_time)
+        t_cable = per_call(lambda: cable_label(cable, 'SHORT', wire_ins, wire_outs), args.min_time)
+        print('{:>6} {:>14.1f} {:>14.3f} {:>14.1f} {:>14.3f}'.format(wires, t_connector * 1e6, t_connector * 1e6 / wires,
+                                                                     t_cable * 1e6, t_cable * 1e6 / wires))
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+import gc
+import argparse
+import tracemalloc
+
+import wireviz
+
+# Memory benchmark of the connection storage: a synthetic harness is built once
+# with one long cable and once with many short cables, and the memory held by the
+# connections (traced after connecting minus traced before) and by the whole
+# harness is reported. Only the public Harness API is used, so the script also
+# runs against older trees (PYTHONPATH=<tree>/src).
+
+def one_cable(h, connections):
+    h.add_connector('X1', pincount=connections)
+    h.add_connector('X2', pincount=connections)
+    h.add_cable('W1', wirecount=connections)
+    yield
+    pins = tuple(range(1, connections + 1))
+    h.connect('X1', pins, 'W1', pins, 'X2', pins)
+
+def many_cables(h, cables, wires):
+    for i in range(cables):
+        h.add_connector('A{}'.format(i), pincount=wires)
+        h.add_connector('B{}'.format(i), pincount=wires)
+        h.add_cable('W{}'.format(i), wirecount=wires)
+    yield
+    pins = tuple(range(1, wires + 1))
+    for i in range(cables):
+        h.connect('A{}'.format(i), pins, 'W{}'.format(i), pins, 'B{}'.format(i), pins)
+
+def measure(build):
+    gc.collect()
+    tracemalloc.start()
+    h = wireviz.Harness()
+    steps = build(h)
+    next(steps) # harness items added
+    gc.collect()
+    items = tracemalloc.get_traced_memory()[0]
+    for _ in steps: # connections made
+        pass
+    gc.collect()
+    total = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return total - items, total
+
+if __name__ == '__main__':
+    ap = argparse.ArgumentParser(description='Measure the memory held by the connections of large synthetic harnesses')
+    ap.add_argument('-n', '--connections', type=int, default=200000, help='connections of the single long cable (default: 200000)')
+    ap.add_argument('-c', '--cables', type=int, default=25000, help='number of short cables (default: 25000)')
+    ap.add_argument('-w', '--wires', type=int, default=8, help='wires per short cable (default: 8)')
+    args = ap.parse_args()
+
+    print('{:<28} {:>16} {:>12}'.format('harness', 'connections MB', 'total MB'))
+    for name, build in (('1 cable x {} wires'.format(args.connections), lambda h: one_cable(h, args.connections)),
+                        ('{} cables x {} wires'.format(args.cables, args.wires), lambda h: many_cables(h, args.cables, args.wires))):
+        connections, total = measure(build)
+        print('{:<28} {:>16.1f} {:>12.1f}'.format(name, connections / 2**20, total / 2**20))
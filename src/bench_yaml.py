@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+import io
+import time
+import argparse
+
+import yaml
+import wv_yaml
+import wireviz
+
+# Benchmark of YAML loading: a synthetic harness file with a long connection list
+# is read with yaml.safe_load (the whole document at once, pure Python) and with
+# every streaming loader available in wv_yaml, both parsing only and building the harness.
+
+def make_yaml(connections, wires):
+    lines = ['connectors:']
+    for i in range(connections):
+        for side in 'AB':
+            lines.append('  {}{}:'.format(side, i))
+            lines.append('    type: Molex KK 254')
+            lines.append('    pinout: [{}]'.format(', '.join('P{}'.format(p) for p in range(1, wires + 1))))
+    lines.append('cables:')
+    for i in range(connections):
+        lines.append('  W{}:'.format(i))
+        lines.append('    wirecount: {}'.format(wires))
+        lines.append('    gauge: 0.25 mm2')
+        lines.append('    length: 1')
+        lines.append('    color_code: DIN')
+    lines.append('connections:')
+    for i in range(connections):
+        lines.append('  -')
+        lines.append('    - A{}: [1-{}]'.format(i, wires))
+        lines.append('    - W{}: [{}]'.format(i, ', '.join(str(w) for w in range(1, wires + 1))))
+        lines.append('    - B{}: [1-{}]'.format(i, wires))
+    return '\n'.join(lines) + '\n'
+
+def consume(sections):
+    for _, value in sections:
+        if not isinstance(value, (dict, list)):
+            for _ in value:
+                pass
+
+def best_of(f, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        f()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+if __name__ == '__main__':
+    ap = argparse.ArgumentParser(description='Time YAML loading of a large synthetic harness file')
+    ap.add_argument('-n', '--connections', type=int, default=7000, help='number of connection entries (default: 7000, about 2 MB)')
+    ap.add_argument('-w', '--wires', type=int, default=8, help='wires per connection (default: 8)')
+    ap.add_argument('-r', '--repeat', type=int, default=3, help='number of runs, the best is reported (default: 3)')
+    args = ap.parse_args()
+
+    text = make_yaml(args.connections, args.wires)
+    print('{} connections, {:.1f} MB of YAML, libyaml {}available'.format(args.connections, len(text) / 2**20, '' if yaml.__with_libyaml__ else 'not '))
+    print('{:<24} {:>10} {:>10}'.format('loader', 'parse s', 'build s'))
+    parse = best_of(lambda: yaml.safe_load(io.StringIO(text)), args.repeat)
+    build = best_of(lambda: wireviz.harness_from_dict(yaml.safe_load(io.StringIO(text))), args.repeat)
+    print('{:<24} {:>10.3f} {:>10.3f}'.format('safe_load (whole)', parse, build))
+    for name in wv_yaml.LOADERS:
+        parse = best_of(lambda: consume(wv_yaml.iter_sections(io.StringIO(text), name)), args.repeat)
+        build = best_of(lambda: wireviz.harness_from_sections(wv_yaml.iter_sections(io.StringIO(text), name)), args.repeat)
+        print('{:<24} {:>10.3f} {:>10.3f}'.format('{} (streaming)'.format(name), parse, build))
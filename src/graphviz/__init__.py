@@ -26,16 +26,20 @@ digraph {
 
 from .dot import Graph, Digraph
 from .files import Source
+from .cache import RenderCache
 from .lang import escape, nohtml
-from .backend import (render, pipe, version, view,
+from .backend import (render, render_formats, pipe, pack, version, view,
+                      arender, apipe, pipe_batch, render_batch,
                       ENGINES, FORMATS, RENDERERS, FORMATTERS,
                       ExecutableNotFound, RequiredArgumentError)
 
 __all__ = [
     'Graph', 'Digraph',
     'Source',
+    'RenderCache',
     'escape', 'nohtml',
-    'render', 'pipe', 'version', 'view',
+    'render', 'render_formats', 'pipe', 'pack', 'version', 'view',
+    'arender', 'apipe', 'pipe_batch', 'render_batch',
     'ENGINES', 'FORMATS', 'RENDERERS', 'FORMATTERS',
     'ExecutableNotFound', 'RequiredArgumentError',
 ]
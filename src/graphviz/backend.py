@@ -3,6 +3,7 @@
 import os
 import re
 import errno
+import struct
 import logging
 import platform
 import subprocess
@@ -12,7 +13,8 @@ from . import _compat
 from . import tools
 
 __all__ = [
-    'render', 'pipe', 'version', 'view',
+    'render', 'render_formats', 'pipe', 'pack', 'version', 'view',
+    'arender', 'apipe', 'pipe_batch', 'render_batch',
     'ENGINES', 'FORMATS', 'RENDERERS', 'FORMATTERS',
     'ExecutableNotFound', 'RequiredArgumentError',
 ]
@@ -107,7 +109,8 @@ class CalledProcessError(_compat.CalledProcessError):
         return '%s [stderr: %r]' % (s, self.stderr)
 
 
-def command(engine, format_, filepath=None, renderer=None, formatter=None):
+def command(engine, format_, filepath=None, renderer=None, formatter=None,
+            neato_no_op=None):
     """Return args list for ``subprocess.Popen`` and name of the rendered file."""
     if formatter is not None and renderer is None:
         raise RequiredArgumentError('formatter given without renderer')
@@ -122,7 +125,10 @@ def command(engine, format_, filepath=None, renderer=None, formatter=None):
         raise ValueError('unknown formatter: %r' % formatter)
 
     output_format = [f for f in (format_, renderer, formatter) if f is not None]
-    cmd = [engine, '-T%s' % ':'.join(output_format)]
+    cmd = [engine]
+    if neato_no_op:
+        cmd.append('-n%d' % neato_no_op)
+    cmd.append('-T%s' % ':'.join(output_format))
 
     if filepath is None:
         rendered = None
@@ -134,6 +140,31 @@ def command(engine, format_, filepath=None, renderer=None, formatter=None):
     return cmd, rendered
 
 
+def command_formats(engine, formats, outfile, neato_no_op=None):
+    """Return args list for ``subprocess.Popen`` and names of the rendered files.
+
+    Each format gets its own ``-T``/``-o`` pair, so a single layout
+    pass writes all of them.
+    """
+    if engine not in ENGINES:
+        raise ValueError('unknown engine: %r' % engine)
+    if not formats:
+        raise RequiredArgumentError('at least one format is required')
+
+    cmd = [engine]
+    if neato_no_op:
+        cmd.append('-n%d' % neato_no_op)
+    rendered = []
+    for format_ in formats:
+        if format_ not in FORMATS:
+            raise ValueError('unknown format: %r' % format_)
+        filename = '%s.%s' % (outfile, format_)
+        cmd.extend(['-T%s' % format_, '-o', filename])
+        rendered.append(filename)
+
+    return cmd, rendered
+
+
 if PLATFORM == 'windows':  # pragma: no cover
     def get_startupinfo():
         """Return subprocess.STARTUPINFO instance hiding the console window."""
@@ -222,7 +253,53 @@ def render(engine, format, filepath, renderer=None, formatter=None, quiet=False)
     return rendered
 
 
-def pipe(engine, format, data, renderer=None, formatter=None, quiet=False):
+def render_formats(engine, formats, filepath, outfile=None, quiet=False,
+                   neato_no_op=None):
+    """Render file with Graphviz ``engine`` into all ``formats`` at once.
+
+    Args:
+        engine: The layout commmand used for rendering (``'dot'``, ``'neato'``, ...).
+        formats: Sequence of output formats (``'png'``, ``'svg'``, ...).
+        filepath: Path to the DOT source file to render.
+        outfile: Basename (without extension) of the rendered files, relative
+                 to the directory of ``filepath`` (defaults to ``filepath``).
+        quiet (bool): Suppress ``stderr`` output from the layout subprocess.
+        neato_no_op (int): Pass ``-n<neato_no_op>`` to the layout command, so that
+                           ``neato`` keeps the positions of an already laid out
+                           source (``1``: nodes, ``2``: nodes and edges).
+    Returns:
+        List of the (possibly relative) paths of the rendered files.
+    Raises:
+        ValueError: If ``engine`` or one of the ``formats`` is not known.
+        graphviz.RequiredArgumentError: If ``formats`` is empty.
+        graphviz.ExecutableNotFound: If the Graphviz executable is not found.
+        subprocess.CalledProcessError: If the exit status is non-zero.
+
+    The graph is laid out only once; the layout command writes one file
+    per format. Like :func:`render`, it is started from the directory of
+    ``filepath``.
+    """
+    dirname, filename = os.path.split(filepath)
+    del filepath
+
+    if outfile is None:
+        outfile = filename
+
+    cmd, rendered = command_formats(engine, formats, outfile,
+                                    neato_no_op=neato_no_op)
+    cmd.append(filename)
+    if dirname:
+        cwd = dirname
+        rendered = [os.path.join(dirname, r) for r in rendered]
+    else:
+        cwd = None
+
+    run(cmd, capture_output=True, cwd=cwd, check=True, quiet=quiet)
+    return rendered
+
+
+def pipe(engine, format, data, renderer=None, formatter=None, quiet=False,
+         neato_no_op=None):
     """Return ``data`` piped through Graphviz ``engine`` into ``format``.
 
     Args:
@@ -232,6 +309,248 @@ def pipe(engine, format, data, renderer=None, formatter=None, quiet=False):
         renderer: The output renderer used for rendering (``'cairo'``, ``'gd'``, ...).
         formatter: The output formatter used for rendering (``'cairo'``, ``'gd'``, ...).
         quiet (bool): Suppress ``stderr`` output from the layout subprocess.
+        neato_no_op (int): Pass ``-n<neato_no_op>`` to the layout command, so that
+                           ``neato`` keeps the positions of an already laid out
+                           source (``1``: nodes, ``2``: nodes and edges).
+    Returns:
+        Binary (encoded) stdout of the layout command.
+    Raises:
+        ValueError: If ``engine``, ``format``, ``renderer``, or ``formatter`` are not known.
+        graphviz.RequiredArgumentError: If ``formatter`` is given but ``renderer`` is None.
+        graphviz.ExecutableNotFound: If the Graphviz executable is not found.
+        subprocess.CalledProcessError: If the exit status is non-zero.
+    """
+    cmd, _ = command(engine, format, None, renderer, formatter,
+                     neato_no_op=neato_no_op)
+    out, _ = run(cmd, input=data, capture_output=True, check=True, quiet=quiet)
+    return out
+
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+
+def _split_svg(out, pos):
+    """Return the end offset of the SVG document starting at ``pos``."""
+    end = out.find(b'</svg>', pos)
+    if end < 0:
+        raise RuntimeError('incomplete svg output at byte %d' % pos)
+    end += len(b'</svg>')
+    if out[end:end + 1] == b'\n':
+        end += 1
+    return end
+
+
+def _split_png(out, pos):
+    """Return the end offset of the PNG image starting at ``pos`` (walks the chunks up to IEND)."""
+    if out[pos:pos + len(PNG_SIGNATURE)] != PNG_SIGNATURE:
+        raise RuntimeError('expected png output at byte %d' % pos)
+    pos += len(PNG_SIGNATURE)
+    while pos + 8 <= len(out):
+        length, chunk_type = struct.unpack('>I4s', out[pos:pos + 8])
+        pos += 12 + length  # length, type, data, crc
+        if chunk_type == b'IEND':
+            return pos
+    raise RuntimeError('incomplete png output')
+
+
+SPLITTERS = {'svg': _split_svg, 'png': _split_png}
+
+
+def pipe_batch(engine, formats, data, quiet=False):
+    """Return several graphs piped through a single Graphviz ``engine`` process.
+
+    Args:
+        engine: The layout commmand used for rendering (``'dot'``, ``'neato'``, ...).
+        formats: Sequence of output formats, each one of ``'svg'`` and ``'png'``.
+        data: Sequence of binary (encoded) DOT source strings, one graph each.
+    Returns:
+        List with one ``dict`` per graph, mapping each format to the binary output.
+    Raises:
+        ValueError: If ``engine`` or one of the ``formats`` is not known or cannot be split.
+        graphviz.RequiredArgumentError: If ``formats`` is empty.
+        graphviz.ExecutableNotFound: If the Graphviz executable is not found.
+        subprocess.CalledProcessError: If the exit status is non-zero.
+        RuntimeError: If the output cannot be split into one result per graph and format.
+
+    The sources are concatenated into one input stream, so process startup,
+    plugin loading and font configuration are paid once for all graphs. The
+    layout command writes the results in input order (all formats of a graph
+    before the next graph), which are split at the end of each document.
+    """
+    if engine not in ENGINES:
+        raise ValueError('unknown engine: %r' % engine)
+    if not formats:
+        raise RequiredArgumentError('at least one format is required')
+    for format_ in formats:
+        if format_ not in SPLITTERS:
+            raise ValueError('cannot split %r output' % format_)
+    if not data:
+        return []
+
+    cmd = [engine] + ['-T%s' % f for f in formats]
+    out, _ = run(cmd, input=b'\n'.join(data), capture_output=True, check=True,
+                 quiet=quiet)
+
+    results = []
+    pos = 0
+    for _ in data:
+        result = {}
+        for format_ in formats:
+            end = SPLITTERS[format_](out, pos)
+            result[format_] = out[pos:end]
+            pos = end
+        results.append(result)
+    if out[pos:].strip():
+        raise RuntimeError('unexpected output after the last graph')
+    return results
+
+
+def render_batch(engine, formats, data, outfiles, quiet=False):
+    """Render several graphs with a single Graphviz ``engine`` process, return result filenames.
+
+    Args:
+        engine: The layout commmand used for rendering (``'dot'``, ``'neato'``, ...).
+        formats: Sequence of output formats, each one of ``'svg'`` and ``'png'``.
+        data: Sequence of binary (encoded) DOT source strings, one graph each.
+        outfiles: Sequence of paths (without extension) of the rendered files,
+                  one per graph; ``'.<format>'`` is appended for each format.
+    Returns:
+        List of the paths of the rendered files.
+    Raises:
+        ValueError: If ``engine`` or one of the ``formats`` is not known or cannot be split.
+        graphviz.RequiredArgumentError: If ``formats`` is empty.
+        graphviz.ExecutableNotFound: If the Graphviz executable is not found.
+        subprocess.CalledProcessError: If the exit status is non-zero.
+        RuntimeError: If the output cannot be split into one result per graph and format.
+
+    See :func:`pipe_batch`.
+    """
+    if len(data) != len(outfiles):
+        raise ValueError('one outfile per graph is required')
+
+    rendered = []
+    for outfile, result in zip(outfiles, pipe_batch(engine, formats, data, quiet=quiet)):
+        for format_ in formats:
+            filepath = '%s.%s' % (outfile, format_)
+            tools.mkdirs(filepath)
+            with open(filepath, 'wb') as fd:
+                fd.write(result[format_])
+            rendered.append(filepath)
+    return rendered
+
+
+async def arun(cmd, input=None, capture_output=False, check=False,
+               quiet=False, timeout=None, semaphore=None, **kwargs):
+    """Run the command described by cmd asynchronously, return its (stdout, stderr) tuple.
+
+    Like :func:`run`, but the subprocess is started with
+    :func:`asyncio.create_subprocess_exec`. If ``semaphore`` is given, it is
+    held while the subprocess runs. If ``timeout`` seconds pass or the
+    calling task is cancelled, the subprocess is killed before the
+    :class:`asyncio.TimeoutError` or :class:`asyncio.CancelledError` is
+    propagated.
+    """
+    if semaphore is not None:
+        async with semaphore:
+            return await arun(cmd, input=input, capture_output=capture_output,
+                              check=check, quiet=quiet, timeout=timeout, **kwargs)
+
+    import asyncio  # only needed (and imported) by the asynchronous API
+
+    log.debug('arun %r', cmd)
+
+    if input is not None:
+        kwargs['stdin'] = subprocess.PIPE
+
+    if capture_output:
+        kwargs['stdout'] = kwargs['stderr'] = subprocess.PIPE
+
+    try:
+        proc = await asyncio.create_subprocess_exec(*cmd,
+                                                    startupinfo=get_startupinfo(),
+                                                    **kwargs)
+    except OSError as e:
+        if e.errno == errno.ENOENT:
+            raise ExecutableNotFound(cmd)
+        else:
+            raise
+
+    try:
+        out, err = await asyncio.wait_for(proc.communicate(input), timeout)
+    except BaseException:  # timeout or cancellation: do not leave the child running
+        if proc.returncode is None:
+            log.debug('kill %r', cmd)
+            try:
+                proc.kill()
+            except ProcessLookupError:
+                pass
+            await proc.wait()
+        raise
+
+    if not quiet and err:
+        _compat.stderr_write_bytes(err, flush=True)
+
+    if check and proc.returncode:
+        raise CalledProcessError(proc.returncode, cmd,
+                                 output=out, stderr=err)
+
+    return out, err
+
+
+async def arender(engine, format, filepath, renderer=None, formatter=None,
+                  quiet=False, timeout=None, semaphore=None):
+    """Render file with Graphviz ``engine`` into ``format`` asynchronously, return result filename.
+
+    Args:
+        engine: The layout commmand used for rendering (``'dot'``, ``'neato'``, ...).
+        format: The output format used for rendering (``'pdf'``, ``'png'``, ...).
+        filepath: Path to the DOT source file to render.
+        renderer: The output renderer used for rendering (``'cairo'``, ``'gd'``, ...).
+        formatter: The output formatter used for rendering (``'cairo'``, ``'gd'``, ...).
+        quiet (bool): Suppress ``stderr`` output from the layout subprocess.
+        timeout: Seconds after which the layout subprocess is killed (``None``: no limit).
+        semaphore: :class:`asyncio.Semaphore` limiting the number of concurrent
+                   layout subprocesses (``None``: no limit).
+    Returns:
+        The (possibly relative) path of the rendered file.
+    Raises:
+        ValueError: If ``engine``, ``format``, ``renderer``, or ``formatter`` are not known.
+        graphviz.RequiredArgumentError: If ``formatter`` is given but ``renderer`` is None.
+        graphviz.ExecutableNotFound: If the Graphviz executable is not found.
+        subprocess.CalledProcessError: If the exit status is non-zero.
+        asyncio.TimeoutError: If the subprocess did not finish within ``timeout``.
+
+    Asynchronous version of :func:`render`.
+    """
+    dirname, filename = os.path.split(filepath)
+    del filepath
+
+    cmd, rendered = command(engine, format, filename, renderer, formatter)
+    if dirname:
+        cwd = dirname
+        rendered = os.path.join(dirname, rendered)
+    else:
+        cwd = None
+
+    await arun(cmd, capture_output=True, cwd=cwd, check=True, quiet=quiet,
+               timeout=timeout, semaphore=semaphore)
+    return rendered
+
+
+async def apipe(engine, format, data, renderer=None, formatter=None,
+                quiet=False, timeout=None, semaphore=None):
+    """Return ``data`` piped through Graphviz ``engine`` into ``format`` asynchronously.
+
+    Args:
+        engine: The layout commmand used for rendering (``'dot'``, ``'neato'``, ...).
+        format: The output format used for rendering (``'pdf'``, ``'png'``, ...).
+        data: The binary (encoded) DOT source string to render.
+        renderer: The output renderer used for rendering (``'cairo'``, ``'gd'``, ...).
+        formatter: The output formatter used for rendering (``'cairo'``, ``'gd'``, ...).
+        quiet (bool): Suppress ``stderr`` output from the layout subprocess.
+        timeout: Seconds after which the layout subprocess is killed (``None``: no limit).
+        semaphore: :class:`asyncio.Semaphore` limiting the number of concurrent
+                   layout subprocesses (``None``: no limit).
     Returns:
         Binary (encoded) stdout of the layout command.
     Raises:
@@ -239,8 +558,36 @@ def pipe(engine, format, data, renderer=None, formatter=None, quiet=False):
         graphviz.RequiredArgumentError: If ``formatter`` is given but ``renderer`` is None.
         graphviz.ExecutableNotFound: If the Graphviz executable is not found.
         subprocess.CalledProcessError: If the exit status is non-zero.
+        asyncio.TimeoutError: If the subprocess did not finish within ``timeout``.
+
+    Asynchronous version of :func:`pipe`.
     """
     cmd, _ = command(engine, format, None, renderer, formatter)
+    out, _ = await arun(cmd, input=data, capture_output=True, check=True,
+                        quiet=quiet, timeout=timeout, semaphore=semaphore)
+    return out
+
+
+def pack(data, options=('-array_u1',), quiet=False):
+    """Return the laid out graphs in ``data`` combined into one by ``gvpack``.
+
+    Args:
+        data: The binary (encoded) DOT source of one or more laid out graphs
+              (e.g. the output of ``dot -Tdot``).
+        options: Sequence of additional ``gvpack`` arguments. The default
+                 stacks the graphs in one column, ordered by their ``sortv``
+                 graph attribute.
+        quiet (bool): Suppress ``stderr`` output from the subprocess.
+    Returns:
+        Binary (encoded) DOT source of the combined graph, with positions.
+    Raises:
+        graphviz.ExecutableNotFound: If the ``gvpack`` executable is not found.
+        subprocess.CalledProcessError: If the exit status is non-zero.
+
+    The result can be rendered without a new layout pass with
+    :func:`render_formats` (``engine='neato', neato_no_op=2``).
+    """
+    cmd = ['gvpack'] + list(options)
     out, _ = run(cmd, input=data, capture_output=True, check=True, quiet=quiet)
     return out
 
@@ -0,0 +1,184 @@
+# cache.py - content-addressed cache for rendered output
+
+"""Cache rendered Graphviz output on disk, keyed by the DOT source."""
+
+import os
+import io
+import json
+import errno
+import shutil
+import hashlib
+import logging
+
+from . import backend
+from . import tools
+
+__all__ = ['RenderCache']
+
+VERSION_FILE = 'version.json'
+
+OBJECTS_DIR = 'objects'
+
+EVICT_RATIO = 0.9
+
+
+log = logging.getLogger(__name__)
+
+
+class RenderCache(object):
+    """Size-bounded LRU disk cache for rendered output.
+
+    Args:
+        directory: Directory holding the cache.
+        max_size: Upper bound for the total size of cached output in bytes.
+
+    Entries are keyed by a hash of the DOT source, engine, format,
+    renderer, formatter and the Graphviz version, so a hit can be returned
+    without starting the layout command. The Graphviz version is stored
+    next to the entries together with the size and modification time of
+    the ``dot`` executable, so that it is only detected again when the
+    installation changes.
+
+    The total size of the entries is scanned once, on the first
+    :meth:`put`, and then kept as a running total. Only when it exceeds
+    ``max_size`` are the entries scanned again and the least recently used
+    ones deleted, down to ``EVICT_RATIO`` of ``max_size``, so that a
+    full cache is not scanned on every store. Other processes sharing the
+    directory are only accounted for at that scan.
+    """
+
+    def __init__(self, directory, max_size=256 * 2**20):
+        self.directory = directory
+        self.max_size = max_size
+        self.hits = 0  #: Number of lookups answered from the cache.
+        self.misses = 0  #: Number of lookups that required rendering.
+        self._version = None
+        self._size = None  # running total of the entries, see put()
+
+    def __repr__(self):
+        return '<%s %r hits=%d misses=%d>' % (self.__class__.__name__,
+                                             self.directory,
+                                             self.hits, self.misses)
+
+    @property
+    def objects_dir(self):
+        return os.path.join(self.directory, OBJECTS_DIR)
+
+    def version(self):
+        """Return the Graphviz version tuple, detecting it at most once per installation.
+
+        Raises:
+            graphviz.ExecutableNotFound: If the Graphviz executable is not found.
+        """
+        if self._version is not None:
+            return self._version
+
+        executable = shutil.which('dot')
+        if executable is None:
+            raise backend.ExecutableNotFound(['dot'])
+        st = os.stat(executable)
+        stamp = [executable, st.st_size, st.st_mtime]
+
+        filepath = os.path.join(self.directory, VERSION_FILE)
+        try:
+            with io.open(filepath, encoding='utf-8') as fd:
+                stored = json.load(fd)
+        except (IOError, OSError, ValueError):
+            stored = None
+
+        if stored is not None and stored.get('stamp') == stamp:
+            self._version = tuple(stored['version'])
+        else:
+            self._version = backend.version()
+            tools.mkdirs(filepath)
+            with io.open(filepath, 'w', encoding='utf-8') as fd:
+                fd.write(json.dumps({'stamp': stamp,
+                                     'version': list(self._version)}))
+        return self._version
+
+    def key(self, data, engine, format, renderer=None, formatter=None):
+        """Return the cache key for rendering the binary DOT source ``data``."""
+        h = hashlib.sha256()
+        options = [engine, format, renderer, formatter, self.version()]
+        h.update(repr(options).encode('ascii'))
+        h.update(b'\0')
+        h.update(data)
+        return h.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.objects_dir, key)
+
+    def get(self, key):
+        """Return the cached output for ``key`` or ``None`` (counts hits and misses)."""
+        filepath = self._path(key)
+        try:
+            with io.open(filepath, 'rb') as fd:
+                data = fd.read()
+        except (IOError, OSError) as e:
+            if e.errno != errno.ENOENT:
+                raise
+            self.misses += 1
+            log.debug('cache miss %s', key)
+            return None
+
+        os.utime(filepath, None)  # mark as recently used
+        self.hits += 1
+        log.debug('cache hit %s', key)
+        return data
+
+    def put(self, key, data):
+        """Store ``data`` under ``key`` and evict the least recently used entries if the cache is full."""
+        filepath = self._path(key)
+        tools.mkdirs(filepath)
+        if self._size is None:
+            self._size = self._scan()[1]
+        try:
+            replaced = os.stat(filepath).st_size
+        except OSError:
+            replaced = 0
+        tmp = '%s.tmp%d' % (filepath, os.getpid())
+        with io.open(tmp, 'wb') as fd:
+            fd.write(data)
+        os.replace(tmp, filepath)
+        self._size += len(data) - replaced
+        if self._size > self.max_size:
+            self.evict(int(self.max_size * EVICT_RATIO))
+
+    def _scan(self):
+        """Return the entries as ``(mtime, size, name)`` tuples and their total size."""
+        try:
+            names = os.listdir(self.objects_dir)
+        except OSError:
+            return [], 0
+
+        entries = []
+        total = 0
+        for name in names:
+            try:
+                st = os.stat(os.path.join(self.objects_dir, name))
+            except OSError:  # removed by a concurrent process
+                continue
+            entries.append((st.st_mtime, st.st_size, name))
+            total += st.st_size
+        return entries, total
+
+    def evict(self, size=None):
+        """Delete least recently used entries until the cache fits into ``size`` (default: ``max_size``)."""
+        if size is None:
+            size = self.max_size
+        entries, total = self._scan()
+        entries.sort()
+        for _, entry_size, name in entries:
+            if total <= size:
+                break
+            log.debug('cache evict %s', name)
+            try:
+                os.remove(os.path.join(self.objects_dir, name))
+            except OSError:
+                pass
+            total -= entry_size
+        self._size = total
+
+    def stats(self):
+        """Return a ``dict`` with the hit and miss counters."""
+        return {'hits': self.hits, 'misses': self.misses}
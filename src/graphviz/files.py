@@ -82,6 +82,9 @@ class File(Base):
 
     directory = ''
 
+    #: Optional :class:`.cache.RenderCache` consulted by :meth:`.pipe` and :meth:`.render`.
+    cache = None
+
     _default_extension = 'gv'
 
     def __init__(self, filename=None, directory=None,
@@ -133,10 +136,61 @@ class File(Base):
 
         data = text_type(self.source).encode(self._encoding)
 
+        if self.cache is not None:
+            key = self.cache.key(data, self._engine, format, renderer, formatter)
+            out = self.cache.get(key)
+            if out is not None:
+                return out
+
         out = backend.pipe(self._engine, format, data,
                            renderer=renderer, formatter=formatter,
                            quiet=quiet)
 
+        if self.cache is not None:
+            self.cache.put(key, out)
+
+        return out
+
+    async def apipe(self, format=None, renderer=None, formatter=None, quiet=False,
+                    timeout=None, semaphore=None):
+        """Return the source piped through the Graphviz layout command, without blocking the event loop.
+
+        Args:
+            format: The output format used for rendering (``'pdf'``, ``'png'``, etc.).
+            renderer: The output renderer used for rendering (``'cairo'``, ``'gd'``, ...).
+            formatter: The output formatter used for rendering (``'cairo'``, ``'gd'``, ...).
+            quiet (bool): Suppress ``stderr`` output from the layout subprocess.
+            timeout: Seconds after which the layout subprocess is killed (``None``: no limit).
+            semaphore: :class:`asyncio.Semaphore` limiting the number of concurrent
+                       layout subprocesses (``None``: no limit).
+        Returns:
+            Binary (encoded) stdout of the layout command.
+        Raises:
+            ValueError: If ``format``, ``renderer``, or ``formatter`` are not known.
+            graphviz.RequiredArgumentError: If ``formatter`` is given but ``renderer`` is None.
+            graphviz.ExecutableNotFound: If the Graphviz executable is not found.
+            subprocess.CalledProcessError: If the exit status is non-zero.
+            asyncio.TimeoutError: If the subprocess did not finish within ``timeout``.
+        """
+        if format is None:
+            format = self._format
+
+        data = text_type(self.source).encode(self._encoding)
+
+        if self.cache is not None:
+            key = self.cache.key(data, self._engine, format, renderer, formatter)
+            out = self.cache.get(key)
+            if out is not None:
+                return out
+
+        out = await backend.apipe(self._engine, format, data,
+                                  renderer=renderer, formatter=formatter,
+                                  quiet=quiet, timeout=timeout,
+                                  semaphore=semaphore)
+
+        if self.cache is not None:
+            self.cache.put(key, out)
+
         return out
 
     @property
@@ -204,9 +258,23 @@ class File(Base):
         if format is None:
             format = self._format
 
-        rendered = backend.render(self._engine, format, filepath,
-                                  renderer=renderer, formatter=formatter,
-                                  quiet=quiet)
+        if self.cache is None:
+            rendered = backend.render(self._engine, format, filepath,
+                                      renderer=renderer, formatter=formatter,
+                                      quiet=quiet)
+        else:
+            _, rendered = backend.command(self._engine, format, filepath,
+                                          renderer, formatter)
+            data = text_type(self.source).encode(self._encoding)
+            key = self.cache.key(data, self._engine, format, renderer, formatter)
+            out = self.cache.get(key)
+            if out is not None:
+                _write_bytes(rendered, out)
+            else:
+                backend.render(self._engine, format, filepath,
+                               renderer=renderer, formatter=formatter,
+                               quiet=quiet)
+                self.cache.put(key, _read_bytes(rendered))
 
         if cleanup:
             log.debug('delete %r', filepath)
@@ -217,6 +285,136 @@ class File(Base):
 
         return rendered
 
+    async def arender(self, filename=None, directory=None, cleanup=False,
+                      format=None, renderer=None, formatter=None, quiet=False,
+                      timeout=None, semaphore=None):
+        """Save the source to file and render with the Graphviz engine, without blocking the event loop.
+
+        Args:
+            filename: Filename for saving the source (defaults to ``name`` + ``'.gv'``)
+            directory: (Sub)directory for source saving and rendering.
+            cleanup (bool): Delete the source file after rendering.
+            format: The output format used for rendering (``'pdf'``, ``'png'``, etc.).
+            renderer: The output renderer used for rendering (``'cairo'``, ``'gd'``, ...).
+            formatter: The output formatter used for rendering (``'cairo'``, ``'gd'``, ...).
+            quiet (bool): Suppress ``stderr`` output from the layout subprocess.
+            timeout: Seconds after which the layout subprocess is killed (``None``: no limit).
+            semaphore: :class:`asyncio.Semaphore` limiting the number of concurrent
+                       layout subprocesses (``None``: no limit).
+        Returns:
+            The (possibly relative) path of the rendered file.
+        Raises:
+            ValueError: If ``format``, ``renderer``, or ``formatter`` are not known.
+            graphviz.RequiredArgumentError: If ``formatter`` is given but ``renderer`` is None.
+            graphviz.ExecutableNotFound: If the Graphviz executable is not found.
+            subprocess.CalledProcessError: If the exit status is non-zero.
+            asyncio.TimeoutError: If the subprocess did not finish within ``timeout``.
+
+        Asynchronous version of :meth:`.render` (without opening a viewer).
+        """
+        filepath = self.save(filename, directory)
+
+        if format is None:
+            format = self._format
+
+        if self.cache is None:
+            rendered = await backend.arender(self._engine, format, filepath,
+                                             renderer=renderer, formatter=formatter,
+                                             quiet=quiet, timeout=timeout,
+                                             semaphore=semaphore)
+        else:
+            _, rendered = backend.command(self._engine, format, filepath,
+                                          renderer, formatter)
+            data = text_type(self.source).encode(self._encoding)
+            key = self.cache.key(data, self._engine, format, renderer, formatter)
+            out = self.cache.get(key)
+            if out is not None:
+                _write_bytes(rendered, out)
+            else:
+                await backend.arender(self._engine, format, filepath,
+                                      renderer=renderer, formatter=formatter,
+                                      quiet=quiet, timeout=timeout,
+                                      semaphore=semaphore)
+                self.cache.put(key, _read_bytes(rendered))
+
+        if cleanup:
+            log.debug('delete %r', filepath)
+            os.remove(filepath)
+
+        return rendered
+
+    def render_formats(self, formats, filename=None, directory=None,
+                       outfile=None, view=False, cleanup=False,
+                       quiet=False, quiet_view=False):
+        """Save the source to file and render it into several formats at once.
+
+        Args:
+            formats: Sequence of output formats (``'png'``, ``'svg'``, ...).
+            filename: Filename for saving the source (defaults to ``name`` + ``'.gv'``)
+            directory: (Sub)directory for source saving and rendering.
+            outfile: Basename (without extension) of the rendered files, relative
+                     to ``directory`` (defaults to ``filename``).
+            view (bool): Open the first rendered result with the default application.
+            cleanup (bool): Delete the source file after rendering.
+            quiet (bool): Suppress ``stderr`` output from the layout subprocess.
+            quiet_view (bool): Suppress ``stderr`` output from the viewer process
+                               (implies ``view=True``, ineffective on Windows).
+        Returns:
+            List of the (possibly relative) paths of the rendered files.
+        Raises:
+            ValueError: If one of the ``formats`` is not known.
+            graphviz.RequiredArgumentError: If ``formats`` is empty.
+            graphviz.ExecutableNotFound: If the Graphviz executable is not found.
+            subprocess.CalledProcessError: If the exit status is non-zero.
+            RuntimeError: If viewer opening is requested but not supported.
+
+        Unlike calling :meth:`.render` once per format, the graph is laid
+        out by a single Graphviz process.
+        """
+        formats = [f.lower() for f in formats]
+
+        filepath = self.save(filename, directory)
+
+        if self.cache is None:
+            rendered = backend.render_formats(self._engine, formats, filepath,
+                                              outfile=outfile, quiet=quiet)
+        else:
+            rendered = self._render_formats_cached(formats, filepath, outfile, quiet)
+
+        if cleanup:
+            log.debug('delete %r', filepath)
+            os.remove(filepath)
+
+        if quiet_view or view:
+            self._view(rendered[0], formats[0], quiet_view)
+
+        return rendered
+
+    def _render_formats_cached(self, formats, filepath, outfile, quiet):
+        """Write cached formats directly, render only the missing ones."""
+        dirname, basename = os.path.split(filepath)
+        stem = os.path.join(dirname, outfile if outfile is not None else basename)
+        rendered = ['%s.%s' % (stem, f) for f in formats]
+
+        data = text_type(self.source).encode(self._encoding)
+        keys = [self.cache.key(data, self._engine, f) for f in formats]
+
+        missing = []
+        for format, key, path in zip(formats, keys, rendered):
+            out = self.cache.get(key)
+            if out is None:
+                missing.append((format, key, path))
+            else:
+                _write_bytes(path, out)
+
+        if missing:
+            backend.render_formats(self._engine, [f for f, _, _ in missing],
+                                   filepath, outfile=outfile, quiet=quiet)
+            for _, key, path in missing:
+                self.cache.put(key, _read_bytes(path))
+
+        return rendered
+
     def view(self, filename=None, directory=None, cleanup=False,
              quiet=False, quiet_view=False):
         """Save the source to file, open the rendered result in a viewer.
@@ -263,6 +461,17 @@ class File(Base):
     _view_windows = staticmethod(backend.view.windows)
 
 
+def _read_bytes(filepath):
+    with io.open(filepath, 'rb') as fd:
+        return fd.read()
+
+
+def _write_bytes(filepath, data):
+    log.debug('write %d bytes to %r', len(data), filepath)
+    with io.open(filepath, 'wb') as fd:
+        fd.write(data)
+
+
 class Source(File):
     """Verbatim DOT source code string to be rendered by Graphviz.
 
@@ -1,13 +1,35 @@
 #!/usr/bin/env python3
 import os
+import time
 from dataclasses import dataclass, field
 from typing import Any, List
-from collections import Counter
-import yaml
-from graphviz import Graph
+from collections.abc import Iterator
+import wv_yaml
 
 import wv_colors
-from wv_helper import nested, int2tuple, awg_equiv, flatten2d, tuplelist2tsv
+from array import array
+from wv_helper import int2tuple, tuplelist2tsv, add_slots, expand_pins
+from wv_labels import ferrule_label, connector_label, cable_label
+from wv_profile import Profiler
+
+__version__ = '0.1'
+
+_build_version = None
+
+def build_version():
+    # __version__ plus a hash of the sources (wireviz.py, wv_*.py and the vendored graphviz package),
+    # so that cached harnesses and build manifests are invalidated by any code change
+    global _build_version
+    if _build_version is None:
+        import glob
+        import hashlib
+        here = os.path.dirname(os.path.abspath(__file__))
+        h = hashlib.sha256()
+        for fn in sorted([os.path.join(here, 'wireviz.py')] + glob.glob(os.path.join(here, 'wv_*.py')) + glob.glob(os.path.join(here, 'graphviz', '*.py'))):
+            with open(fn, 'rb') as file:
+                h.update(os.path.relpath(fn, here).encode('utf-8') + b'\0' + file.read())
+        _build_version = '{}+{}'.format(__version__, h.hexdigest()[:16])
+    return _build_version
 
 class Harness:
 
@@ -15,12 +37,14 @@ class Harness:
         self.color_mode = 'SHORT'
         self.connectors = {}
         self.cables = {}
+        self.connection_values = ValueTable() # names in the connections of all cables, interned once
 
     def add_connector(self, name, *args, **kwargs):
         self.connectors[name] = Connector(name, *args, **kwargs)
 
     def add_cable(self, name, *args, **kwargs):
-        self.cables[name] = Cable(name, *args, **kwargs)
+        cable = self.cables[name] = Cable(name, *args, **kwargs)
+        cable.connections.values = self.connection_values # the new table is still empty
 
     def loop(self, connector_name, from_pin, to_pin):
         self.connectors[connector_name].loop(from_pin, to_pin)
@@ -32,7 +56,57 @@ class Harness:
         if to_name in self.connectors:
             self.connectors[to_name].activate_pin(to_pin)
 
-    def create_graph(self):
+    def connect_many(self, from_names, from_pins, via_names, via_pins, to_names, to_pins):
+        # bulk version of connect(): all arguments are parallel sequences of equal length
+        # (lists, tuples, NumPy arrays, ...); a single name or pin (or None, or a NumPy scalar) is used for all rows;
+        # via_pins must be a sequence, it determines the number of rows
+        count = len(via_pins)
+
+        def column(values):
+            if hasattr(values, 'tolist'): # NumPy array or scalar, convert to plain Python values at once
+                values = values.tolist()
+            if values is None or isinstance(values, (str, int)):
+                return [values] * count
+            values = list(values)
+            if len(values) != count:
+                raise Exception('List length mismatch')
+            return values
+
+        from_names, from_pins, via_names, via_pins, to_names, to_pins = map(column, (from_names, from_pins, via_names, via_pins, to_names, to_pins))
+
+        # validate all rows before changing anything
+        unknown = set(via_names) - set(self.cables)
+        if unknown:
+            raise Exception('Unknown cable(s): {}'.format(', '.join(map(str, unknown))))
+        unknown = (set(from_names) | set(to_names)) - set(self.connectors) - {None}
+        if unknown:
+            raise Exception('Unknown connector(s): {}'.format(', '.join(map(str, unknown))))
+
+        # rows of each cable
+        rows = {}
+        for i, via_name in enumerate(via_names):
+            rows.setdefault(via_name, []).append(i)
+        for via_name, indices in rows.items():
+            cable = self.cables[via_name]
+            if len(indices) != count:
+                pick = lambda values: [values[i] for i in indices]
+            else:
+                pick = lambda values: values
+            wires = set(pick(via_pins))
+            if wires - set(range(1, cable.wirecount + 1)) - ({'s'} if cable.shield else set()):
+                raise Exception('Wire number out of range for cable {}'.format(via_name))
+            cable.connections.extend_columns(pick(from_names), pick(from_pins), pick(via_pins), pick(to_names), pick(to_pins))
+
+        for names, pins in ((from_names, from_pins), (to_names, to_pins)):
+            for name, pin in zip(names, pins):
+                if name in self.connectors:
+                    self.connectors[name].visible_pins[pin] = True
+
+    def create_graph(self, layout_attrs=None, connectors=None, cables=None):
+        # layout_attrs: additional graph attributes tuning the layout (see layout_settings)
+        # connectors, cables: optional subsets (dicts by name) to draw instead of the whole harness,
+        # e.g. one connected component (see component_items); port sides must have been assigned then
+        from graphviz import Graph # only imported when a diagram is actually requested
         dot = Graph()
         dot.body.append('// Graph generated by WireViz')
         dot.body.append('// https://github.com/formatc1702/WireViz')
@@ -42,6 +116,8 @@ class Harness:
                           bgcolor='white',
                           nodesep='0.33',
                           fontname=font)
+        if layout_attrs:
+            dot.attr('graph', **layout_attrs)
         dot.attr('node', shape='record',
                          style='filled',
                          fillcolor='white',
@@ -49,60 +125,33 @@ class Harness:
         dot.attr('edge', style='bold',
                          fontname=font)
 
-        # prepare ports on connectors depending on which side they will connect
-        for k, c in self.cables.items():
-            for x in c.connections:
-                if x.from_port is not None: # connect to left
-                    self.connectors[x.from_name].ports_right = True
-                if x.to_port is not None: # connect to right
-                    self.connectors[x.to_name].ports_left = True
+        if connectors is None and cables is None:
+            self.assign_port_sides()
+            connectors, cables = self.connectors, self.cables
 
-        for k, n in self.connectors.items():
-            if n.category == 'ferrule':
-                infostring = '{type}{subtype} {color}'.format(type=n.type,
-                                                               subtype=', {}'.format(n.subtype) if n.subtype else '',
-                                                               color=wv_colors.translate_color(n.color, self.color_mode) if n.color else '')
-                infostring_l = infostring if n.ports_right else ''
-                infostring_r = infostring if n.ports_left else ''
+        # edges are written in order of definition; an edge color statement is only
+        # written when the color differs from the last one, it applies to all following edges
+        edge_color = None
+
+        def set_edge_color(color):
+            nonlocal edge_color
+            if color != edge_color:
+                dot.attr('edge', color=color)
+                edge_color = color
 
+        for k, n in connectors.items():
+            if n.category == 'ferrule':
                 dot.node(k, shape='none',
                             style='filled',
                             margin='0',
                             orientation = '0' if n.ports_left else '180',
-                            label='''<
-
-                <TABLE BORDER="1" CELLBORDER="0" CELLSPACING="0" CELLPADDING="2"><TR>
-                <TD PORT="p1l"> {infostring_l} </TD>
-                {colorbar}
-                <TD PORT="p1r"> {infostring_r} </TD>
-                </TR></TABLE>
-
-
-                >'''.format(infostring_l=infostring_l,
-                            infostring_r=infostring_r,
-                            colorbar='<TD BGCOLOR="{}" BORDER="1" SIDES="LR" WIDTH="4"></TD>'.format(wv_colors.translate_color(n.color, 'HEX')) if n.color else ''))
+                            label=ferrule_label(n, self.color_mode))
 
             else: # not a ferrule
-                # a = attributes
-                a = [n.part_number, n.type,
-                     n.subtype,
-                     '{}-pin'.format(len(n.pinout)) if n.show_pincount else '']
-                # p = pinout
-                p = [[],[],[]]
-                for i, x in enumerate(n.pinout, 1):
-                    if n.hide_disconnected_pins and not n.visible_pins.get(i, False):
-                        continue
-                    p[1].append(x)
-                    if n.ports_left:
-                        p[0].append('<p{portno}l>{portno}'.format(portno=i))
-                    if n.ports_right:
-                        p[2].append('<p{portno}r>{portno}'.format(portno=i))
-                # l = label
-                l = [n.name if n.show_name else '', a, p, n.notes]
-                dot.node(k, label=nested(l))
+                dot.node(k, label=connector_label(n))
 
                 if len(n.loops) > 0:
-                    dot.attr('edge',color='#000000:#ffffff:#000000')
+                    set_edge_color('#000000:#ffffff:#000000')
                     if n.ports_left:
                         loop_side = 'l'
                         loop_dir = 'w'
@@ -112,141 +161,234 @@ class Harness:
                     else:
                         raise Exception('No side for loops')
                     for loop in n.loops:
-                        dot.edge('{name}:p{port_from}{loop_side}:{loop_dir}'.format(name=n.name, port_from=loop[0], port_to=loop[1], loop_side=loop_side, loop_dir=loop_dir),
-                                 '{name}:p{port_to}{loop_side}:{loop_dir}'.format(name=n.name, port_from=loop[0], port_to=loop[1], loop_side=loop_side, loop_dir=loop_dir))
+                        loop_from = '{name}:p{port_from}{loop_side}:{loop_dir}'.format(name=n.name, port_from=loop[0], port_to=loop[1], loop_side=loop_side, loop_dir=loop_dir)
+                        loop_to   = '{name}:p{port_to}{loop_side}:{loop_dir}'.format(name=n.name, port_from=loop[0], port_to=loop[1], loop_side=loop_side, loop_dir=loop_dir)
+                        dot.edge(loop_from, loop_to)
 
-        for k, c in self.cables.items():
-            # a = attributes
-            a = [c.part_number,
-                 '{}x'.format(len(c.colors)) if c.show_wirecount else '',
-                 '{} {}{}'.format(c.gauge, c.gauge_unit, ' ({} AWG)'.format(awg_equiv(c.gauge)) if c.gauge_unit == 'mm\u00B2' and c.show_equiv else '') if c.gauge else '', # TODO: show equiv
-                 '+ S' if c.shield else '',
-                 '{} m'.format(c.length) if c.length > 0 else '']
-            a = list(filter(None, a))
-
-            html = '<table border="0" cellspacing="0" cellpadding="0"><tr><td>' # main table
-
-            html = html + '<table border="0" cellspacing="0" cellpadding="3" cellborder="1">' # name+attributes table
-            if c.show_name:
-                html = html + '<tr><td colspan="{colspan}">{name}</td></tr>'.format(colspan=len(a), name=c.name)
-            html = html + '<tr>' # attribute row
-            for attrib in a:
-                html = html + '<td>{attrib}</td>'.format(attrib=attrib)
-            html = html + '</tr>' # attribute row
-            html = html + '</table></td></tr>' # name+attributes table
-
-            html = html + '<tr><td>&nbsp;</td></tr>' # spacer between attributes and wires
-
-            html = html + '<tr><td><table border="0" cellspacing="0" cellborder="0">' # conductor table
-
-            for i, x in enumerate(c.colors,1):
-                p = []
-                p.append('<!-- {}_in -->'.format(i))
-                p.append(wv_colors.translate_color(x, self.color_mode))
-                p.append('<!-- {}_out -->'.format(i))
-                html = html + '<tr>'
-                for bla in p:
-                    html = html + '<td>{}</td>'.format(bla)
-                html = html + '</tr>'
-                bgcolor = wv_colors.translate_color(x, 'hex')
-                html = html + '<tr><td colspan="{colspan}" cellpadding="0" height="6" bgcolor="{bgcolor}" border="2" sides="tb" port="{port}"></td></tr>'.format(colspan=len(p), bgcolor=bgcolor if bgcolor != '' else '#ffffff', port='w{}'.format(i))
-
-            if c.shield:
-                p = ['<!-- s_in -->', 'Shield', '<!-- s_out -->']
-                html = html + '<tr><td>&nbsp;</td></tr>' # spacer
-                html = html + '<tr>'
-                for bla in p:
-                    html = html + '<td>{}</td>'.format(bla)
-                html = html + '</tr>'
-                html = html + '<tr><td colspan="{colspan}" cellpadding="0" height="6" border="2" sides="b" port="{port}"></td></tr>'.format(colspan=len(p), bgcolor=wv_colors.translate_color(x, 'hex'), port='ws')
-
-            html = html + '<tr><td>&nbsp;</td></tr>' # spacer at the end
-
-            html = html + '</table>' # conductor table
-
-            html = html + '</td></tr>'  # main table
-            if c.notes:
-                html = html + '<tr><td cellpadding="3">{}</td></tr>'.format(c.notes) # notes table
-                html = html + '<tr><td>&nbsp;</td></tr>' # spacer at the end
-
-            html = html + '</table>'  # main table
+        for k, c in cables.items():
+            # endpoint strings shown next to each wire, keyed by wire number (or 's' for the shield)
+            wire_ins = {}
+            wire_outs = {}
 
             # connections
             for x in c.connections:
                 if isinstance(x.via_port, int): # check if it's an actual wire and not a shield
                     search_color = c.colors[x.via_port-1]
                     if search_color in wv_colors.color_hex:
-                        dot.attr('edge',color='#000000:{wire_color}:#000000'.format(wire_color=wv_colors.color_hex[search_color]))
+                        set_edge_color('#000000:{wire_color}:#000000'.format(wire_color=wv_colors.color_hex[search_color]))
                     else: # color name not found
-                        dot.attr('edge',color='#000000:#ffffff:#000000')
+                        set_edge_color('#000000:#ffffff:#000000')
                 else: # it's a shield connection
-                    dot.attr('edge',color='#000000')
+                    set_edge_color('#000000')
 
                 if x.from_port is not None: # connect to left
                     from_ferrule = self.connectors[x.from_name].category == 'ferrule'
                     code_left_1 = '{from_name}{from_port}:e'.format(from_name=x.from_name, from_port=':p{}r'.format(x.from_port) if not from_ferrule else '')
                     code_left_2 = '{via_name}:w{via_wire}:w'.format(via_name=c.name, via_wire=x.via_port, via_subport='i' if c.show_pinout else '')
                     dot.edge(code_left_1, code_left_2)
-                    from_string = '{}:{}'.format(x.from_name, x.from_port) if not from_ferrule else ''
-                    html = html.replace('<!-- {}_in -->'.format(x.via_port), from_string)
+                    wire_ins.setdefault(x.via_port, '{}:{}'.format(x.from_name, x.from_port) if not from_ferrule else '')
                 if x.to_port is not None: # connect to right
                     to_ferrule = self.connectors[x.to_name].category == 'ferrule'
                     code_right_1 = '{via_name}:w{via_wire}:e'.format(via_name=c.name, via_wire=x.via_port, via_subport='o' if c.show_pinout else '')
                     code_right_2 = '{to_name}{to_port}:w'.format(to_name=x.to_name, to_port=':p{}l'.format(x.to_port) if not to_ferrule else '')
                     dot.edge(code_right_1, code_right_2)
-                    to_string = '{}:{}'.format(x.to_name, x.to_port) if not to_ferrule else ''
-                    html = html.replace('<!-- {}_out -->'.format(x.via_port), to_string)
+                    wire_outs.setdefault(x.via_port, '{}:{}'.format(x.to_name, x.to_port) if not to_ferrule else '')
 
+            html = cable_label(c, self.color_mode, wire_ins, wire_outs)
             dot.node(c.name, label='<{html}>'.format(html=html), shape='box', style='filled,dashed' if c.category=='bundle' else '', margin='0', fillcolor='white')
 
         return dot
 
-    def output(self, filename, directory='_output', view=False, cleanup=True, format='pdf', gen_bom=False):
+    def assign_port_sides(self):
+        # prepare ports on connectors depending on which side they will connect
+        for k, c in self.cables.items():
+            for x in c.connections:
+                if x.from_port is not None: # connect to left
+                    self.connectors[x.from_name].ports_right = True
+                if x.to_port is not None: # connect to right
+                    self.connectors[x.to_name].ports_left = True
+
+    def components(self):
+        # connected components as lists of connector and cable names, in order of definition;
+        # a cable joins the connectors (and ferrules) at both ends of its wires, loops stay within one connector
+        parent = {name: name for name in list(self.connectors) + list(self.cables)}
+
+        def find(name):
+            while parent[name] != name:
+                parent[name] = parent[parent[name]] # path halving
+                name = parent[name]
+            return name
+
+        for k, c in self.cables.items():
+            for x in c.connections:
+                for other in (x.from_name if x.from_port is not None else None,
+                              x.to_name if x.to_port is not None else None):
+                    if other is not None:
+                        root, other_root = find(k), find(other)
+                        if root != other_root:
+                            parent[other_root] = root
+
+        groups = {}
+        for name in parent:
+            groups.setdefault(find(name), []).append(name)
+        return list(groups.values())
+
+    def component_items(self, names):
+        # (connectors, cables) of one component as returned by components(), for create_graph
+        return ({k: self.connectors[k] for k in names if k in self.connectors},
+                {k: self.cables[k] for k in names if k in self.cables})
+
+    def graph_stats(self):
+        # size of the graph handed to Graphviz
+        nodes = len(self.connectors) + len(self.cables)
+        edges = sum(len(n.loops) for n in self.connectors.values())
+        for c in self.cables.values():
+            for x in c.connections:
+                edges += (x.from_port is not None) + (x.to_port is not None)
+        ports = sum(n.pincount for n in self.connectors.values()) + sum(c.wirecount + c.shield for c in self.cables.values())
+        return {'nodes': nodes, 'edges': edges, 'ports': ports}
+
+    def render(self, formats=('svg',), render_cache=None, engine='graphviz', layout='auto'):
+        # in-memory rendering: returns {format: bytes}, the DOT source is piped to Graphviz and nothing is written to disk;
+        # the graph is laid out only once for all formats; layout is 'auto', 'full', 'fast' or 'draft' (see layout_settings);
+        # engine='native' lays out the harness in Python (SVG only, see wv_layout)
+        if isinstance(formats, str):
+            formats = (formats,)
+        if engine == 'native':
+            from wv_layout import render_svg
+            check_native_formats(formats)
+            return {'svg': render_svg(self).encode('utf-8')} if formats else {}
+        from graphviz import backend
+        d = self.create_graph(layout_attrs=layout_settings(self.graph_stats(), layout)[1])
+        formats = list(dict.fromkeys(formats))
+        data = d.source.encode(d.encoding)
+        result = {}
+        if render_cache is not None:
+            keys = {f: render_cache.key(data, d.engine, f) for f in formats}
+            for f in formats:
+                out = render_cache.get(keys[f])
+                if out is not None:
+                    result[f] = out
+        missing = [f for f in formats if f not in result]
+        if len(missing) == 1:
+            result[missing[0]] = backend.pipe(d.engine, missing[0], data)
+        elif all(f in backend.SPLITTERS for f in missing):
+            # svg and png: one dot run writes all formats, the output stream is split per format
+            result.update(backend.pipe_batch(d.engine, missing, [data])[0] if missing else {})
+        else:
+            # dot lays the graph out once (-Tdot adds the positions), neato -n2 renders every format from it
+            laid_out = backend.pipe(d.engine, 'dot', data)
+            for f in missing:
+                result[f] = backend.pipe('neato', f, laid_out, neato_no_op=2)
+        if render_cache is not None:
+            for f in missing:
+                render_cache.put(keys[f], result[f])
+        return {f: result[f] for f in formats}
+
+    def output(self, filename, directory='_output', view=False, cleanup=None, format=None, gen_bom=True, render_cache=None, profiler=None, html=True, gv=True,
+               split_components=False, jobs=None, layout='auto', engine='graphviz'):
+        # writes only the requested artifacts: {filename}.gv (gv), one file per entry of format,
+        # {filename}.bom.tsv (gen_bom) and {filename}.html (html, which needs the SVG and the BOM);
+        # split_components lays out independent sub-harnesses in parallel (see render_components);
+        # layout is 'auto', 'full', 'fast' or 'draft' (see layout_settings);
+        # engine='native' writes the SVG without Graphviz (see wv_layout), no .gv is written then;
+        # format defaults to pdf, or svg for the native engine;
+        # cleanup is the older spelling of gv: cleanup=True is gv=False, cleanup=False is gv=True
+        if cleanup is not None:
+            gv = not cleanup
+        profiler = profiler or Profiler()
+        if format is None:
+            format = ('svg',) if engine == 'native' else ('pdf',)
+        if isinstance(format, str):
+            format = (format,)
+        format = [f.lower() for f in format]
+        # the HTML report embeds the SVG, render it in the same dot run and remove it afterwards
+        svg_temporary = html and 'svg' not in format
+        formats = format + ['svg'] if svg_temporary else format
+
+        if engine == 'native':
+            check_native_formats(formats)
+            formats, gv = [], False
+            svg = None
+            if format or html:
+                from wv_layout import render_svg
+                with profiler.stage('native_layout'):
+                    svg = render_svg(self)
+                if format:
+                    with open(os.path.join(directory, '{}.svg'.format(filename)), 'w', encoding='utf-8') as file:
+                        file.write(svg)
+        elif engine != 'graphviz':
+            raise Exception('Unknown engine {}'.format(engine))
+
+        components = self.components() if split_components and formats else []
+
+        if formats or gv:
+            stats = self.graph_stats()
+            profiler.metrics.update(stats)
+            layout, layout_attrs, estimate = layout_settings(stats, layout)
+            profiler.record('layout', layout)
+            profiler.record('layout_estimate', estimate)
+
         # graphical output
-        d = self.create_graph()
-        for f in format:
-            d.format = f
-            d.render(filename=filename, directory=directory, view=view, cleanup=cleanup)
-        d.save(filename='{}.gv'.format(filename), directory=directory)
+        if len(components) > 1:
+            profiler.record('components', len(components))
+            with profiler.stage('create_graph'):
+                self.assign_port_sides() # once for all components
+                graphs = [self.create_graph(layout_attrs, *self.component_items(names)) for names in components]
+            profiler.record('dot_bytes', sum(len(g.source.encode(g.encoding)) for g in graphs))
+            with profiler.stage('dot'):
+                rendered = render_components(graphs, formats, filepath=os.path.join(directory, '{}.gv'.format(filename)),
+                                             outfile=os.path.basename(filename), jobs=jobs, cleanup=not gv, cache=render_cache)
+            if view:
+                from graphviz import view as view_file
+                view_file(rendered[0])
+        elif formats or gv:
+            with profiler.stage('create_graph'):
+                d = self.create_graph(layout_attrs=layout_attrs)
+            profiler.record('dot_bytes', len(d.source.encode(d.encoding)))
+            d.cache = render_cache # reuse previously rendered output if the DOT source is unchanged
+            if formats:
+                # lay out once, write the .gv source and all formats in a single dot run
+                with profiler.stage('dot'):
+                    d.render_formats(formats, filename='{}.gv'.format(filename), directory=directory,
+                                     outfile=os.path.basename(filename), view=view, cleanup=not gv)
+            else:
+                d.save(filename='{}.gv'.format(filename), directory=directory)
+        if formats:
+            # actual layout cost, to compare with layout_estimate
+            profiler.record('layout_wall', profiler.stages[-1]['wall'])
         # bom output
+        if gen_bom or html:
+            with profiler.stage('bom'):
+                bom_list = self.output_bom(filename) if gen_bom else self.bom_list()
+        # HTML output, with the SVG read back in one piece
+        if html:
+            from wv_html import write_html
+            with profiler.stage('html'):
+                if engine != 'native':
+                    with open('{}.svg'.format(filename), 'r') as file:
+                        svg = file.read()
+                    if svg_temporary:
+                        os.remove('{}.svg'.format(filename))
+                write_html('{}.html'.format(filename), svg, bom_list)
+
+    def output_bom(self, filename):
         bom_list = self.bom_list()
         with open('{}.bom.tsv'.format(filename),'w') as file:
             file.write(tuplelist2tsv(bom_list))
-        # HTML output
-        with open('{}.html'.format(filename),'w') as file:
-            file.write('<html><body style="font-family:Arial">')
-
-            file.write('<h1>Diagram</h1>')
-            with open('{}.svg'.format(filename),'r') as svg:
-                for l in svg:
-                    file.write(l)
-
-            file.write('<h1>Bill of Materials</h1>')
-            listy = flatten2d(bom_list)
-            file.write('<table style="border:1px solid #000000; font-size: 14pt; border-spacing: 0px">')
-            file.write('<tr>')
-            for item in listy[0]:
-                file.write('<th align="left" style="border:1px solid #000000; padding: 8px">{}</th>'.format(item))
-            file.write('</tr>')
-            for row in listy[1:]:
-                file.write('<tr>')
-                for i, item in enumerate(row):
-                    file.write('<td {align} style="border:1px solid #000000; padding: 4px">{content}</td>'.format(content=item, align='align="right"' if listy[0][i] == 'Qty' else ''))
-                file.write('</tr>')
-            file.write('</table>')
-
-            file.write('</body></html>')
+        return bom_list
 
     def bom(self):
+        # every group of similar items is collected in a single pass over the connectors/cables
         bom = []
         bom_connectors = []
         bom_cables = []
         # connectors
-        types = Counter([(v.type, v.subtype, v.pincount) for v in self.connectors.values()])
-        for type in types:
-            items = {k: v for k, v in self.connectors.items()  if (v.type, v.subtype, v.pincount) == type}
-            shared = next(iter(items.values()))
-            designators = list(items.keys())
+        types = {}
+        for k, v in self.connectors.items():
+            types.setdefault((v.type, v.subtype, v.pincount), []).append(k)
+        for designators in types.values():
+            shared = self.connectors[designators[0]]
             designators.sort()
             part_number = shared.part_number
             name = 'Connector{type}{subtype}{pincount}{color}'.format(type = ', {}'.format(shared.type) if shared.type else '',
@@ -257,55 +399,52 @@ class Harness:
             if part_number is not None:  # set part number only if it exists
                 item['part number'] = part_number
             bom_connectors.append(item)
-            bom_connectors = sorted(bom_connectors, key=lambda k: k['item']) # https://stackoverflow.com/a/73050
+        bom_connectors.sort(key=lambda k: k['item']) # https://stackoverflow.com/a/73050
         bom.extend(bom_connectors)
-        # cables
-        types = Counter([(v.category, v.gauge, v.gauge_unit, v.wirecount, v.shield) for v in self.cables.values()])
-        for type in types:
-            items = {k: v for k, v in self.cables.items() if (v.category, v.gauge, v.gauge_unit, v.wirecount, v.shield) == type}
-            shared = next(iter(items.values()))
-            if shared.category != 'bundle':
-                designators = list(items.keys())
-                designators.sort()
-                part_number = shared.part_number
-                total_length = sum(i.length for i in items.values())
-                name = 'Cable, {wirecount}{gauge}{shield}'.format(wirecount = shared.wirecount,
-                                                                   gauge = ' x {} {}'.format(shared.gauge, shared.gauge_unit) if shared.gauge else ' wires',
-                                                                   shield = ' shielded' if shared.shield else '')
-                item = {'item': name, 'qty': round(total_length, 3), 'unit': 'm', 'designators': designators}
-                if part_number is not None:  # set part number only if it exists
-                    item['part number'] = part_number
-                bom_cables.append(item)
-        # bundles (ignores wirecount)
-        wirelist = []
-        # list all cables again, since bundles are represented as wires internally, with the category='bundle' set
-        types = Counter([(v.category, v.gauge, v.gauge_unit, v.length) for v in self.cables.values()])
-        for type in types:
-            items = {k: v for k, v in self.cables.items() if (v.category, v.gauge, v.gauge_unit, v.length) == type}
-            shared = next(iter(items.values()))
-            # filter out cables that are not bundles
-            if shared.category == 'bundle':
-                for bundle in items.values():
-                    # add each wire from each bundle to the wirelist
-                    for color in bundle.colors:
-                        wirelist.append({'gauge': shared.gauge, 'gauge_unit': shared.gauge_unit, 'length': shared.length, 'color': color, 'designators': list(items.keys())})
-        # join similar wires from all the bundles to a single BOM item
-        types = Counter([(v['gauge'], v['gauge_unit'], v['color']) for v in wirelist])
-        for type in types:
-            items = [v for v in wirelist if (v['gauge'], v['gauge_unit'], v['color']) == type]
-            shared = items[0]
-            designators = [i['designators'] for i in items]
-            # flatten nested list
-            designators = [item for sublist in designators for item in sublist] # https://stackoverflow.com/a/952952
-            # remove duplicates
-            designators = list(dict.fromkeys(designators))
+        # cables, and bundles grouped by gauge and length (bundles are represented as cables with category='bundle')
+        cable_types = {}
+        bundle_types = {}
+        for k, v in self.cables.items():
+            if v.category != 'bundle':
+                cable_types.setdefault((v.category, v.gauge, v.gauge_unit, v.wirecount, v.shield), []).append(k)
+            else:
+                bundle_types.setdefault((v.gauge, v.gauge_unit, v.length), []).append(k)
+        for designators in cable_types.values():
+            shared = self.cables[designators[0]]
+            total_length = sum(self.cables[k].length for k in designators)
             designators.sort()
-            total_length = sum(i['length'] for i in items)
-            name = 'Wire, {gauge}{color}'.format(gauge='{} {}'.format(shared['gauge'], shared['gauge_unit']) if shared['gauge'] else '',
-                                                 color=', {}'.format(shared['color']) if shared['color'] != '' else '')
+            part_number = shared.part_number
+            name = 'Cable, {wirecount}{gauge}{shield}'.format(wirecount = shared.wirecount,
+                                                               gauge = ' x {} {}'.format(shared.gauge, shared.gauge_unit) if shared.gauge else ' wires',
+                                                               shield = ' shielded' if shared.shield else '')
             item = {'item': name, 'qty': round(total_length, 3), 'unit': 'm', 'designators': designators}
+            if part_number is not None:  # set part number only if it exists
+                item['part number'] = part_number
             bom_cables.append(item)
-            bom_cables = sorted(bom_cables, key=lambda k: k['item']) # https://stackoverflow.com/a/73050
+        # bundles (ignores wirecount)
+        # join similar wires from all the bundles to a single BOM item;
+        # each wire lists all bundles of the same gauge and length as designators
+        wires = {}
+        for bundles in bundle_types.values():
+            shared = self.cables[bundles[0]]
+            for bundle in bundles:
+                for color in self.cables[bundle].colors:
+                    wire = wires.get((shared.gauge, shared.gauge_unit, color))
+                    if wire is None:
+                        wire = wires[(shared.gauge, shared.gauge_unit, color)] = {'length': 0, 'bundle_types': []}
+                    wire['length'] += shared.length
+                    if not wire['bundle_types'] or wire['bundle_types'][-1] is not bundles:
+                        wire['bundle_types'].append(bundles)
+        for (gauge, gauge_unit, color), wire in wires.items():
+            # flatten and remove duplicates
+            designators = list(dict.fromkeys(k for bundles in wire['bundle_types'] for k in bundles))
+            designators.sort()
+            name = 'Wire, {gauge}{color}'.format(gauge='{} {}'.format(gauge, gauge_unit) if gauge else '',
+                                                 color=', {}'.format(color) if color != '' else '')
+            item = {'item': name, 'qty': round(wire['length'], 3), 'unit': 'm', 'designators': designators}
+            bom_cables.append(item)
+        if wires: # cables are only sorted together with bundle wires
+            bom_cables.sort(key=lambda k: k['item']) # https://stackoverflow.com/a/73050
         bom.extend(bom_cables)
         return bom
 
@@ -325,6 +464,7 @@ class Harness:
             bom_list.append(item_list)
         return bom_list
 
+@add_slots('ports_left', 'ports_right', 'loops', 'visible_pins')
 @dataclass
 class Connector:
     name: str
@@ -365,6 +505,7 @@ class Connector:
     def activate_pin(self, pin):
         self.visible_pins[pin] = True
 
+@add_slots('connections', 'wirecount_and_shield')
 @dataclass
 class Cable:
     name: str
@@ -399,7 +540,7 @@ class Cable:
         else:
             pass # gauge not specified
 
-        self.connections = []
+        self.connections = ConnectionTable()
 
         if self.wirecount: # number of wires explicitly defined
             if self.colors: # use custom color palette (partly or looped if needed)
@@ -432,9 +573,9 @@ class Cable:
         if len(from_pin) != len(to_pin):
             raise Exception('from_pin must have the same number of elements as to_pin')
         for i, x in enumerate(from_pin):
-            # self.connections.append((from_name, from_pin[i], via_pin[i], to_name, to_pin[i]))
-            self.connections.append(Connection(from_name, from_pin[i], via_pin[i], to_name, to_pin[i]))
+            self.connections.add(from_name, from_pin[i], via_pin[i], to_name, to_pin[i])
 
+@add_slots()
 @dataclass
 class Connection:
     from_name: Any
@@ -443,190 +584,513 @@ class Connection:
     to_name:   Any
     to_port:   Any
 
-def parse(file_in, file_out=None, gen_bom=False):
+class ValueTable:
+    # interned values of connection tables: endpoint names, and pins that are not stored as plain integers;
+    # one table is shared by all cables of a harness, so that every name is stored once
 
-    file_in = os.path.abspath(file_in)
-    if not file_out:
-        file_out = file_in
-        pre, ext = os.path.splitext(file_out)
-        file_out = pre # extension will be added by graphviz output function
-    file_out = os.path.abspath(file_out)
+    __slots__ = ('values', 'codes')
 
-    with open(file_in, 'r') as stream:
-        input = yaml.safe_load(stream)
-
-    def expand(input):
-        # input can be:
-        # - a singleton (normally str or int)
-        # - a list of str or int
-        # if str is of the format '#-#', it is treated as a range (inclusive) and expanded
-        output = []
-        if not isinstance(input, list):
-            input = [input,]
-        for e in input:
-            e = str(e)
-            if '-' in e: # list of pins
-                a, b = tuple(map(int, e.split('-')))
-                if a < b:
-                    for x in range(a,b+1):
-                        output.append(x)
-                elif a > b:
-                    for x in range(a,b-1,-1):
-                        output.append(x)
-                elif a == b:
-                    output.append(a)
+    def __init__(self):
+        self.values = [] # code -> value
+        self.codes = {} # value -> code
+
+    def encode(self, value):
+        key = (type(value), value) # keep 1, 1.0 and True apart
+        code = self.codes.get(key)
+        if code is None:
+            code = self.codes[key] = len(self.values)
+            self.values.append(value)
+        return code
+
+PIN_MAX = 2**31 - 1 # larger integer pins are interned like other values
+
+class ConnectionTable:
+    # connections of one cable, stored as a flat integer array with one row of five entries per connection
+    # (from_name, from_port, via_port, to_name, to_port); -1 encodes None, names are codes into a ValueTable,
+    # integer pins from 0 to PIN_MAX are stored as they are, other pins (e.g. 's' for the shield) as -2 - code;
+    # indexing and iterating return ConnectionView objects, which read and write the row in place
+
+    __slots__ = ('values', 'rows')
+
+    def __init__(self, values=None):
+        self.values = values if values is not None else ValueTable()
+        self.rows = array('i')
+
+    def encode_name(self, value):
+        return -1 if value is None else self.values.encode(value)
+
+    def encode_pin(self, value):
+        if type(value) == int and 0 <= value <= PIN_MAX:
+            return value
+        return -1 if value is None else -2 - self.values.encode(value)
+
+    def encode_row(self, from_name, from_port, via_port, to_name, to_port):
+        return (self.encode_name(from_name), self.encode_pin(from_port), self.encode_pin(via_port),
+                self.encode_name(to_name), self.encode_pin(to_port))
+
+    def get(self, index, field):
+        code = self.rows[index * 5 + field]
+        if code >= 0:
+            return self.values.values[code] if field in (0, 3) else code
+        return None if code == -1 else self.values.values[-2 - code]
+
+    def set(self, index, field, value):
+        self.rows[index * 5 + field] = self.encode_name(value) if field in (0, 3) else self.encode_pin(value)
+
+    def add(self, from_name, from_port, via_port, to_name, to_port):
+        self.rows.extend(self.encode_row(from_name, from_port, via_port, to_name, to_port))
+
+    def append(self, connection):
+        # like list.append; connection is a Connection or a ConnectionView
+        self.add(connection.from_name, connection.from_port, connection.via_port, connection.to_name, connection.to_port)
+
+    def extend(self, connections):
+        for connection in connections:
+            self.append(connection)
+
+    def extend_columns(self, from_names, from_ports, via_ports, to_names, to_ports):
+        # append many connections at once; the arguments are parallel sequences
+        rows = zip(map(self.encode_name, from_names), map(self.encode_pin, from_ports), map(self.encode_pin, via_ports),
+                   map(self.encode_name, to_names), map(self.encode_pin, to_ports))
+        self.rows.extend(code for row in rows for code in row)
+
+    def __len__(self):
+        return len(self.rows) // 5
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [ConnectionView(self, i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('connection index out of range')
+        return ConnectionView(self, index)
+
+    def __setitem__(self, index, connection):
+        if isinstance(index, slice): # like list: connection is a sequence of connections
+            # encode all rows first, the connections may be views into this table
+            rows = [self.encode_row(c.from_name, c.from_port, c.via_port, c.to_name, c.to_port) for c in connection]
+            start, stop, step = index.indices(len(self))
+            if step == 1:
+                stop = max(start, stop)
+                self.rows[start * 5:stop * 5] = array('i', (code for row in rows for code in row))
             else:
-                try:
-                    x = int(e)
-                except:
-                    x = e
-                output.append(x)
-        return output
-
-    def check_designators(what, where):
-        for i, x in enumerate(what):
-            if x not in input[where[i]]:
-                return False
-        return True
+                indices = range(start, stop, step)
+                if len(rows) != len(indices):
+                    raise ValueError('attempt to assign {} connections to extended slice of size {}'.format(len(rows), len(indices)))
+                for i, row in zip(indices, rows):
+                    self.rows[i * 5:i * 5 + 5] = array('i', row)
+            return
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('connection index out of range')
+        self.rows[index * 5:index * 5 + 5] = array('i', self.encode_row(connection.from_name, connection.from_port, connection.via_port,
+                                                                         connection.to_name, connection.to_port))
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield ConnectionView(self, index)
+
+def _view_field(field):
+    return property(lambda view: view.table.get(view.index, field),
+                    lambda view, value: view.table.set(view.index, field, value))
+
+class ConnectionView:
+    # one row of a ConnectionTable, with the attributes of a Connection
+
+    __slots__ = ('table', 'index')
+
+    def __init__(self, table, index):
+        self.table = table
+        self.index = index
+
+    from_name = _view_field(0)
+    from_port = _view_field(1)
+    via_port  = _view_field(2)
+    to_name   = _view_field(3)
+    to_port   = _view_field(4)
+
+    def astuple(self):
+        return (self.from_name, self.from_port, self.via_port, self.to_name, self.to_port)
+
+    def __eq__(self, other):
+        if not isinstance(other, (Connection, ConnectionView)):
+            return NotImplemented
+        return self.astuple() == (other.from_name, other.from_port, other.via_port, other.to_name, other.to_port)
+
+    __hash__ = None
+
+    def __repr__(self):
+        return 'Connection(from_name={!r}, from_port={!r}, via_port={!r}, to_name={!r}, to_port={!r})'.format(*self.astuple())
+
+# Graph attributes per layout level. 'fast' and 'draft' cut the crossing minimization
+# (mclimit, remincross) and network simplex iterations (nslimit, nslimit1, searchsize)
+# and use newrank, 'draft' additionally draws straight edges instead of routed splines.
+LAYOUT_ATTRS = {
+    'full':  {},
+    'fast':  {'mclimit': '0.3', 'nslimit': '2', 'nslimit1': '2', 'searchsize': '10',
+              'newrank': 'true', 'splines': 'polyline'},
+    'draft': {'mclimit': '0.05', 'nslimit': '0.5', 'nslimit1': '0.5', 'searchsize': '5',
+              'newrank': 'true', 'remincross': 'false', 'splines': 'line'},
+}
+
+# thresholds of the estimated layout cost above which 'auto' picks a cheaper level;
+# the largest example harness (ex06) is estimated at about 200
+LAYOUT_AUTO = [('draft', 50000), ('fast', 10000)]
+
+def layout_estimate(stats):
+    # rough, unitless cost model of a dot layout: crossing minimization dominates and grows
+    # with the number of edges times the number of ranking passes (~ log of the node count),
+    # record and HTML ports add a linear term
+    return stats['edges'] * max(stats['nodes'], 1).bit_length() + stats['ports']
+
+def layout_settings(stats, layout='auto'):
+    # returns (level, graph attributes, estimated cost) for graph_stats() and the requested level
+    estimate = layout_estimate(stats)
+    if layout == 'auto':
+        layout = next((level for level, threshold in LAYOUT_AUTO if estimate > threshold), 'full')
+    if layout not in LAYOUT_ATTRS:
+        raise Exception('Unknown layout level {}'.format(layout))
+    return layout, LAYOUT_ATTRS[layout], estimate
+
+def check_native_formats(formats):
+    unsupported = [f for f in formats if f.lower() != 'svg']
+    if unsupported:
+        raise Exception('The native layout engine only writes SVG, not {}'.format(', '.join(unsupported)))
+
+def render_components(graphs, formats, filepath, outfile=None, jobs=None, cleanup=False, cache=None):
+    # every graph is laid out by its own dot process (-Tdot keeps the source, adds positions),
+    # gvpack stacks the results in one column, and neato -n2 renders them without a new layout;
+    # with a RenderCache (cache), the layout of every unchanged component is reused
+    from concurrent.futures import ThreadPoolExecutor
+    from graphviz import backend, tools
+    for i, g in enumerate(graphs):
+        g.attr('graph', sortv=str(i)) # keep the order of definition in the packed result
+
+    def layout(g):
+        data = g.source.encode(g.encoding)
+        if cache is None:
+            return backend.pipe('dot', 'dot', data)
+        key = cache.key(data, 'dot', 'dot')
+        out = cache.get(key)
+        if out is None:
+            out = backend.pipe('dot', 'dot', data)
+            cache.put(key, out)
+        return out
+
+    # threads only wait for the dot processes, the layouts run in parallel in separate processes
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        laid_out = list(executor.map(layout, graphs))
+
+    packed = backend.pack(b''.join(laid_out))
+    tools.mkdirs(filepath)
+    with open(filepath, 'wb') as file:
+        file.write(packed)
+    rendered = backend.render_formats('neato', formats, filepath, outfile=outfile, neato_no_op=2)
+    if cleanup:
+        os.remove(filepath)
+    return rendered
+
+def build_harness(file_in, profiler=None, harness_cache=None):
+    profiler = profiler or Profiler()
+
+    if harness_cache is not None:
+        with profiler.stage('harness_cache'):
+            content_hash = harness_cache.content_hash(file_in)
+            h = harness_cache.load(file_in, content_hash, Harness)
+        profiler.record('harness_cache', 'hit' if h is not None else 'miss')
+        if h is not None:
+            return h
+
+    # YAML loading and harness construction are interleaved: connections are added while the file is read;
+    # the construction is timed separately and the remainder of the combined stage is reported as load_yaml
+    loader, _ = wv_yaml.select_loader() # the loader iter_sections() will use
+    profiler.record('yaml_loader', loader)
+    timings = {'wall': 0.0, 'cpu': 0.0}
+    with profiler.stage('build_harness'):
+        with open(file_in, 'r') as stream:
+            h = harness_from_sections(wv_yaml.iter_sections(stream, loader), timings)
+    profiler.split_stage('load_yaml', timings['wall'], timings['cpu'])
+
+    if harness_cache is not None:
+        harness_cache.store(file_in, content_hash, h)
+    return h
+
+def harness_from_dict(input):
+    return harness_from_sections(input.items())
+
+def load(input):
+    # builds a Harness without touching the file system;
+    # input can be a dict, YAML text or an open (text or binary) stream
+    if isinstance(input, dict):
+        return harness_from_dict(input)
+    return harness_from_sections(wv_yaml.iter_sections(input))
+
+def harness_from_sections(sections, timings=None):
+    # sections: (name, value) pairs of the top-level YAML mapping;
+    # the value of 'connections' may be a list or an iterator yielding one entry at a time;
+    # timings, if given, is a dict whose 'wall' and 'cpu' entries are increased by the time spent
+    # building the harness, excluding the time the sections iterator spends reading YAML
 
     h = Harness()
 
-    # add items
-    sections = ['connectors','cables','ferrules','connections']
-    types    = [dict, dict, dict, list]
-    for sec, ty in zip(sections, types):
-        if sec in input and type(input[sec]) == ty:
-            if len(input[sec]) > 0:
-                if ty == dict:
-                    for k, o in input[sec].items():
-                        if sec == 'connectors':
-                            h.add_connector(name=k, **o)
-                        elif sec == 'cables':
-                            h.add_cable(name=k, **o)
-                        elif sec == 'ferrules':
-                            pass
-            else:
-                pass # section exists but is empty
-        else: # section does not exist, create empty section
-            if ty == dict:
-                input[sec] = {}
-            elif ty == list:
-                input[sec] = []
-
-    # add connections
-    ferrule_counter = 0
-    for con in input['connections']:
+    # section ('connectors', 'cables' or 'ferrules') of every defined designator;
+    # connectors and cables take precedence over ferrules of the same name
+    index = {}
+    ferrules = {}
+
+    def check_lengths(*pin_lists):
+        if len(set(len(p) for p in pin_lists)) > 1:
+            raise Exception('List length mismatch')
+
+    # resolved connections are rows of a flat table:
+    # ('connect', from_name, from_pin, via_name, via_pin, to_name, to_pin)
+    # ('loop', connector_name, from_pin, to_pin)
+    # ('ferrule', ferrule_name, cable_name, cable_pin, side of the cable the ferrule is on)
+    def connector_cable(from_name, from_pins, to_name, to_pins):
+        check_lengths(from_pins, to_pins)
+        return (('connect', from_name, from_pin, to_name, to_pin, None, None) for from_pin, to_pin in zip(from_pins, to_pins))
+
+    def cable_connector(from_name, from_pins, to_name, to_pins):
+        check_lengths(from_pins, to_pins)
+        return (('connect', None, None, from_name, from_pin, to_name, to_pin) for from_pin, to_pin in zip(from_pins, to_pins))
+
+    def connector_connector(from_name, from_pins, to_name, to_pins):
+        check_lengths(from_pins, to_pins)
+        return (('loop', from_name, from_pin, to_pin) for from_pin, to_pin in zip(from_pins, to_pins))
+
+    def ferrule_cable(from_name, from_pins, to_name, to_pins):
+        return (('ferrule', from_name, to_name, to_pin, 'from') for to_pin in to_pins)
+
+    def cable_ferrule(from_name, from_pins, to_name, to_pins):
+        return (('ferrule', to_name, from_name, from_pin, 'to') for from_pin in from_pins)
+
+    # two-element connections, dispatched on the kinds of both designators
+    dispatch = {('connectors', 'cables'):     connector_cable,
+                ('cables',     'connectors'): cable_connector,
+                ('connectors', 'connectors'): connector_connector,
+                ('ferrules',   'cables'):     ferrule_cable,
+                ('cables',     'ferrules'):   cable_ferrule}
+
+    def designator(c):
+        # (name, pin spec) of one element of a connection entry
+        if type(c) == str: # ferrules may be given by name only
+            return c, c
+        if type(c) != dict or len(c) != 1: # each entry must have only one key, which is the designator
+            raise Exception('Too many keys')
+        return next(iter(c.items()))
+
+    def resolve(con):
+        # classify a connection entry once, expand each pin list once, return its rows
         if len(con) == 3: # format: connector -- cable -- conector
-
-            for c in con:
-                if len(list(c.keys())) != 1: # check that each entry in con has only one key, which is the designator
-                    raise Exception('Too many keys')
-
-            from_name = list(con[0].keys())[0]
-            via_name  = list(con[1].keys())[0]
-            to_name   = list(con[2].keys())[0]
-
-            if not check_designators([from_name,via_name,to_name],('connectors','cables','connectors')):
-                print([from_name,via_name,to_name])
-                raise Exception('Bad connection definition (3)')
-
-            from_pins = expand(con[0][from_name])
-            via_pins  = expand(con[1][via_name])
-            to_pins   = expand(con[2][to_name])
-
-            if len(from_pins) != len(via_pins) or len(via_pins) != len(to_pins):
-                raise Exception('List length mismatch')
-
-            for (from_pin, via_pin, to_pin) in zip(from_pins, via_pins, to_pins):
-                h.connect(from_name, from_pin, via_name, via_pin, to_name, to_pin)
-
+            (from_name, from_spec), (via_name, via_spec), (to_name, to_spec) = [designator(c) for c in con]
+            if (index.get(from_name), index.get(via_name), index.get(to_name)) != ('connectors', 'cables', 'connectors'):
+                raise Exception('Bad connection definition (3): {}'.format([from_name, via_name, to_name]))
+            from_pins = expand_pins(from_spec)
+            via_pins  = expand_pins(via_spec)
+            to_pins   = expand_pins(to_spec)
+            check_lengths(from_pins, via_pins, to_pins)
+            return (('connect', from_name, from_pin, via_name, via_pin, to_name, to_pin) for from_pin, via_pin, to_pin in zip(from_pins, via_pins, to_pins))
         elif len(con) == 2:
-
-            for c in con:
-                if type(c) is dict:
-                    if len(list(c.keys())) != 1: # check that each entry in con has only one key, which is the designator
-                        raise Exception('Too many keys')
-
-            # hack to make the format for ferrules compatible with the formats for connectors and cables
-            if type(con[0]) == str:
-                name = con[0]
-                con[0] = {}
-                con[0][name] = name
-            if type(con[1]) == str:
-                name = con[1]
-                con[1] = {}
-                con[1][name] = name
-
-            from_name = list(con[0].keys())[0]
-            to_name   = list(con[1].keys())[0]
-
-            con_cbl = check_designators([from_name, to_name],('connectors','cables'))
-            cbl_con = check_designators([from_name, to_name],('cables','connectors'))
-            con_con = check_designators([from_name, to_name],('connectors','connectors'))
-
-
-            fer_cbl = check_designators([from_name, to_name],('ferrules','cables'))
-            cbl_fer = check_designators([from_name, to_name],('cables','ferrules'))
-
-            if not con_cbl and not cbl_con and not con_con and not fer_cbl and not cbl_fer:
+            (from_name, from_spec), (to_name, to_spec) = [designator(c) for c in con]
+            handler = dispatch.get((index.get(from_name), index.get(to_name)))
+            if handler is None:
                 raise Exception('Wrong designators')
+            return handler(from_name, expand_pins(from_spec), to_name, expand_pins(to_spec))
+        else:
+            raise Exception('Wrong number of connection parameters')
 
-            from_pins = expand(con[0][from_name])
-            to_pins  = expand(con[1][to_name])
-
-            if con_cbl or cbl_con or con_con:
-                if len(from_pins) != len(to_pins):
-                    raise Exception('List length mismatch')
-
-            if con_cbl or cbl_con:
-                for (from_pin, to_pin) in zip(from_pins, to_pins):
-                    if con_cbl:
-                        h.connect(from_name, from_pin, to_name, to_pin, None, None)
-                    else: # cbl_con
-                        h.connect(None, None, from_name, from_pin, to_name, to_pin)
-            elif con_con:
-                cocon_coname  = list(con[0].keys())[0]
-                from_pins = expand(con[0][from_name])
-                to_pins   = expand(con[1][to_name])
-
-                for (from_pin, to_pin) in zip(from_pins, to_pins):
-                    h.loop(cocon_coname, from_pin, to_pin)
-            if fer_cbl or cbl_fer:
-                from_pins = expand(con[0][from_name])
-                to_pins   = expand(con[1][to_name])
-
-                if fer_cbl:
-                    ferrule_name = from_name
-                    cable_name = to_name
-                    cable_pins = to_pins
-                else:
-                    ferrule_name = to_name
-                    cable_name = from_name
-                    cable_pins = from_pins
-
-                ferrule_params = input['ferrules'][ferrule_name]
-                for cable_pin in cable_pins:
-                    ferrule_counter = ferrule_counter + 1
-                    ferrule_id = '_F{}'.format(ferrule_counter)
-                    h.add_connector(ferrule_id, category='ferrule', **ferrule_params)
-
-                    if fer_cbl:
-                        h.connect(ferrule_id, 1, cable_name, cable_pin, None, None)
-                    else:
-                        h.connect(None, None, cable_name, cable_pin, ferrule_id, 1)
+    ferrule_counter = 0
 
+    def apply(rows):
+        nonlocal ferrule_counter
+        for row in rows:
+            if row[0] == 'connect':
+                h.connect(*row[1:])
+            elif row[0] == 'loop':
+                h.loop(*row[1:])
+            else: # ferrule, one instance per cable pin
+                _, ferrule_name, cable_name, cable_pin, side = row
+                ferrule_counter += 1
+                ferrule_id = '_F{}'.format(ferrule_counter)
+                h.add_connector(ferrule_id, category='ferrule', **ferrules[ferrule_name])
+                if side == 'from':
+                    h.connect(ferrule_id, 1, cable_name, cable_pin, None, None)
+                else:
+                    h.connect(None, None, cable_name, cable_pin, ferrule_id, 1)
+
+    def is_defined(con):
+        # True if all designators in a connection entry refer to items that were already defined
+        if not isinstance(con, list):
+            return True # malformed, resolve() reports it
+        for c in con:
+            names = [c] if isinstance(c, str) else c if isinstance(c, dict) else []
+            for name in names:
+                if name not in index:
+                    return False
+        return True
 
+    # connections that refer to items defined further down in the file;
+    # once an entry waits here, all later entries wait behind it, so the file order is kept
+    pending = []
+    defined = set() # sections read so far
+
+    def define(sec, value):
+        defined.add(sec)
+        for k, o in value.items():
+            if sec == 'connectors':
+                h.add_connector(name=k, **o)
+            elif sec == 'cables':
+                h.add_cable(name=k, **o)
+            else:
+                ferrules[k] = o
+            if sec != 'ferrules' or k not in index:
+                index[k] = sec
+
+    def add_connection(con, waiting):
+        if pending:
+            pending.append(con)
+        elif is_defined(con) or (not waiting and 'ferrules' in defined):
+            apply(resolve(con)) # an undefined designator is reported right away
         else:
-            raise Exception('Wrong number of connection parameters')
+            pending.append(con) # may name an item defined further down
+
+    def add_pending():
+        for con in pending:
+            apply(resolve(con))
+
+    def timed(f, *args):
+        # only the harness construction is timed, not the reading of the next section or connection
+        if timings is None:
+            return f(*args)
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            return f(*args)
+        finally:
+            timings['wall'] += time.perf_counter() - wall
+            timings['cpu'] += time.process_time() - cpu
+
+    for sec, value in sections:
+        if sec in ('connectors', 'cables', 'ferrules') and type(value) == dict:
+            timed(define, sec, value)
+        elif sec == 'connections' and isinstance(value, (list, Iterator)):
+            waiting = not {'connectors', 'cables'} <= defined
+            for con in value:
+                timed(add_connection, con, waiting)
+    timed(add_pending)
+
+    return h
+
+def build_bom(file_in):
+    # BOM only, without laying out or rendering the diagram
+    return build_harness(file_in).bom_list()
+
+def parse(file_in, file_out=None, gen_bom=True, render_cache=None, bom_only=False, format=None, profile_callback=None, harness_cache=None, html=True, gv=True, split_components=False, layout='auto', engine='graphviz'):
+    # profile_callback, if given, is called with a dict of per-stage timings and graph metrics
+    # bom_only is a shortcut for format=(), html=False, gv=False
+    # format defaults to png and svg, or svg only for the native engine
+
+    file_in = os.path.abspath(file_in)
+    if not file_out:
+        file_out = file_in
+        pre, ext = os.path.splitext(file_out)
+        file_out = pre # extension will be added by graphviz output function
+    file_out = os.path.abspath(file_out)
 
-    h.output(filename=file_out, format=('png','svg'), gen_bom=gen_bom, view=False)
+    profiler = Profiler()
+    profiler.record('file', file_in)
+
+    h = build_harness(file_in, profiler=profiler, harness_cache=harness_cache)
+
+    if bom_only:
+        format, html, gv, gen_bom = (), False, False, True
+    elif format is None:
+        format = ('svg',) if engine == 'native' else ('png', 'svg')
+    h.output(filename=file_out, format=format, gen_bom=gen_bom, view=False, render_cache=render_cache, profiler=profiler, html=html, gv=gv,
+             split_components=split_components, layout=layout, engine=engine)
+
+    if profile_callback is not None:
+        profile_callback(profiler.report())
+
+def parse_batch(files_in, gen_bom=True, format=('png','svg'), html=True, gv=True, layout='auto', harness_cache=None):
+    # like parse() for several files (outputs next to each input), but all diagrams are rendered
+    # by a single dot process; only svg and png can be batched
+    from graphviz import backend
+    if isinstance(format, str):
+        format = (format,)
+    format = [f.lower() for f in format]
+    formats = format + ['svg'] if html and 'svg' not in format else format
+
+    files_out = [os.path.splitext(os.path.abspath(f))[0] for f in files_in]
+    harnesses = [build_harness(os.path.abspath(f), harness_cache=harness_cache) for f in files_in]
+    graphs = [h.create_graph(layout_attrs=layout_settings(h.graph_stats(), layout)[1]) for h in harnesses]
+    if gv:
+        for d, file_out in zip(graphs, files_out):
+            d.save(filename='{}.gv'.format(file_out))
+    if formats:
+        results = backend.pipe_batch('dot', formats, [d.source.encode(d.encoding) for d in graphs])
+    else:
+        results = [{} for _ in graphs]
+
+    for h, file_out, result in zip(harnesses, files_out, results):
+        for f in format:
+            with open('{}.{}'.format(file_out, f), 'wb') as file:
+                file.write(result[f])
+        if gen_bom or html:
+            bom_list = h.output_bom(file_out) if gen_bom else h.bom_list()
+        if html:
+            from wv_html import write_html
+            write_html('{}.html'.format(file_out), result['svg'].decode('utf-8'), bom_list)
 
 if __name__ == '__main__':
     import argparse
+    import json
+    import sys
     ap = argparse.ArgumentParser()
     ap.add_argument('file_input', nargs='?', default='_test/test.yml')
     ap.add_argument('file_output', nargs='?', default=None)
-    ap.add_argument('--bom', action='store_const', default=True, const=True)
+    ap.add_argument('--formats', default=None, help='comma-separated list of diagram formats (default: png,svg, or svg for the native engine; empty for none)')
+    ap.add_argument('--bom', action='store_true', default=True, help=argparse.SUPPRESS) # BOM is generated by default, kept for compatibility
+    ap.add_argument('--no-bom', dest='bom', action='store_false', help='do not write the .bom.tsv file')
+    ap.add_argument('--no-html', dest='html', action='store_false', help='do not write the .html report')
+    ap.add_argument('--no-gv', dest='gv', action='store_false', help='do not keep the .gv source')
+    ap.add_argument('--bom-only', action='store_true', help='only generate the BOM, skip the diagram')
+    ap.add_argument('--layout', choices=['auto', 'full', 'fast', 'draft'], default='auto', help='layout quality (default: auto, chosen from the graph size)')
+    ap.add_argument('--draft', dest='layout', action='store_const', const='draft', help='fastest layout for previews, same as --layout draft')
+    ap.add_argument('--engine', choices=['graphviz', 'native'], default='graphviz', help='layout engine; native needs no Graphviz but only writes SVG (default: graphviz)')
+    ap.add_argument('--split-components', action='store_true', help='lay out independent sub-harnesses in parallel and pack them (needs gvpack)')
+    ap.add_argument('--cache-dir', default=None, help='cache rendered output in this directory')
+    ap.add_argument('--cache-size', type=int, default=256, help='maximum size of the render cache in MB')
+    ap.add_argument('--harness-cache', default=None, metavar='DIR', help='cache parsed harnesses in this directory')
+    ap.add_argument('--profile', nargs='?', const='-', default=None, metavar='FILE', help='write a JSON timing report to FILE (default: stdout)')
     args = ap.parse_args()
 
-    parse(args.file_input, file_out=args.file_output, gen_bom=args.bom)
+    render_cache = None
+    if args.cache_dir:
+        from graphviz import RenderCache
+        render_cache = RenderCache(args.cache_dir, max_size=args.cache_size * 2**20)
+
+    harness_cache = None
+    if args.harness_cache:
+        from wv_cache import HarnessCache
+        harness_cache = HarnessCache(args.harness_cache, build_version())
+
+    def write_profile(report):
+        if args.profile == '-':
+            print(json.dumps(report, indent=2))
+        else:
+            with open(args.profile, 'w') as file:
+                json.dump(report, file, indent=2)
+
+    formats = None # parse() picks the default for the engine
+    if args.formats is not None:
+        formats = [f.strip() for f in args.formats.split(',') if f.strip()]
+
+    parse(args.file_input, file_out=args.file_output, gen_bom=args.bom, render_cache=render_cache, bom_only=args.bom_only,
+          format=formats, profile_callback=write_profile if args.profile else None, harness_cache=harness_cache,
+          html=args.html, gv=args.gv, split_components=args.split_components, layout=args.layout, engine=args.engine)
+
+    if render_cache is not None:
+        # on stderr, stdout may carry the JSON profile
+        print('Render cache: {hits} hits, {misses} misses'.format(**render_cache.stats()), file=sys.stderr)
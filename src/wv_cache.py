@@ -0,0 +1,52 @@
+import os
+import pickle
+import hashlib
+
+class HarnessCache:
+    # stores fully built Harness objects, one file per input file;
+    # an entry is only used if the content hash of the input and the WireViz version (see wireviz.build_version) still match
+
+    def __init__(self, directory, version):
+        self.directory = directory
+        self.version = version
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, file_in):
+        name = hashlib.sha256(os.path.abspath(file_in).encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, '{}.pickle'.format(name))
+
+    @staticmethod
+    def content_hash(file_in):
+        h = hashlib.sha256()
+        with open(file_in, 'rb') as file:
+            for chunk in iter(lambda: file.read(2**20), b''):
+                h.update(chunk)
+        return h.hexdigest()
+
+    def _stamp(self, content_hash, cls):
+        # the defining module is part of the stamp, since classes pickled from a script run as __main__ cannot be loaded elsewhere
+        return (self.version, content_hash, cls.__module__)
+
+    def load(self, file_in, content_hash, cls):
+        try:
+            with open(self._path(file_in), 'rb') as file:
+                stamp, harness = pickle.load(file)
+        except Exception: # missing, truncated or incompatible entry
+            stamp = None
+        if stamp != self._stamp(content_hash, cls):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return harness
+
+    def store(self, file_in, content_hash, harness):
+        path = self._path(file_in)
+        os.makedirs(self.directory, exist_ok=True)
+        tmp = '{}.tmp{}'.format(path, os.getpid())
+        with open(tmp, 'wb') as file:
+            pickle.dump((self._stamp(content_hash, type(harness)), harness), file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path) # replaces a stale entry for the same input file
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses}
@@ -1,4 +1,8 @@
+import re
 from typing import Any, List
+from dataclasses import fields
+from functools import lru_cache
+from itertools import chain
 
 def awg_equiv(mm2):
     awg_equiv_table = {
@@ -52,10 +56,75 @@ def flatten2d(input):
     return output
 
 def tuplelist2tsv(input, header=None):
-    output = ''
     if header is not None:
         input.insert(0, header)
     input = flatten2d(input)
-    for row in input:
-        output = output + '\t'.join(str(item) for item in row) + '\n'
-    return output
+    return ''.join('\t'.join(row) + '\n' for row in input)
+
+def add_slots(*extra):
+    # rebuild a dataclass with __slots__ instead of a per-instance __dict__;
+    # extra are attributes assigned outside of the generated __init__ (e.g. in __post_init__)
+    def decorator(cls):
+        names = tuple(f.name for f in fields(cls)) + extra
+        namespace = dict(cls.__dict__)
+        for name in names:
+            namespace.pop(name, None) # default values would clash with the slots
+        namespace.pop('__dict__', None)
+        namespace.pop('__weakref__', None)
+        namespace['__slots__'] = names
+        return type(cls)(cls.__name__, cls.__bases__, namespace)
+    return decorator
+
+class PinList:
+    # compiled pin specification: a sequence of range objects and single pins,
+    # so that len() and iteration work without materializing large ranges
+
+    __slots__ = ('segments', 'length')
+
+    def __init__(self, segments):
+        self.segments = tuple(segments)
+        self.length = sum(len(s) for s in self.segments)
+
+    def __len__(self):
+        return self.length
+
+    def __iter__(self):
+        return chain.from_iterable(self.segments)
+
+    def __repr__(self):
+        return 'PinList({!r})'.format(self.segments)
+
+pin_range = re.compile(r'\s*(-?\d+)\s*-\s*(-?\d+)\s*')
+
+def _compile_pins(spec):
+    segments = []
+    for e in spec:
+        if type(e) is int:
+            segments.append((e,))
+            continue
+        e = str(e)
+        m = pin_range.fullmatch(e)
+        if m: # range, inclusive, ascending or descending
+            a, b = int(m.group(1)), int(m.group(2))
+            segments.append(range(a, b + 1) if a <= b else range(a, b - 1, -1))
+        else: # single pin, numbered or named (names may contain '-')
+            try:
+                x = int(e)
+            except ValueError:
+                x = e
+            segments.append((x,))
+    return PinList(segments)
+
+_compile_pins_cached = lru_cache(maxsize=4096)(_compile_pins)
+
+def expand_pins(spec):
+    # spec can be:
+    # - a singleton (normally str or int)
+    # - a list of str or int
+    # if str is of the format '#-#', it is treated as a range (inclusive)
+    if not isinstance(spec, list):
+        spec = [spec,]
+    spec = tuple(spec)
+    if all(type(e) in (int, str) for e in spec): # hashable and unambiguous as cache key
+        return _compile_pins_cached(spec)
+    return _compile_pins(spec)
@@ -0,0 +1,34 @@
+from wv_helper import flatten2d
+
+# The report is assembled as a list of fragments and written with a single call;
+# the diagram is embedded from the SVG text as is.
+
+def html_report(svg, bom_list):
+    html = []
+    html.append('<html><body style="font-family:Arial">')
+
+    html.append('<h1>Diagram</h1>')
+    html.append(svg)
+
+    html.append('<h1>Bill of Materials</h1>')
+    listy = flatten2d(bom_list)
+    html.append('<table style="border:1px solid #000000; font-size: 14pt; border-spacing: 0px">')
+    html.append('<tr>')
+    for item in listy[0]:
+        html.append('<th align="left" style="border:1px solid #000000; padding: 8px">{}</th>'.format(item))
+    html.append('</tr>')
+    # alignment per column, looked up once instead of per cell
+    aligns = ['align="right"' if item == 'Qty' else '' for item in listy[0]]
+    for row in listy[1:]:
+        html.append('<tr>')
+        for align, item in zip(aligns, row):
+            html.append('<td {align} style="border:1px solid #000000; padding: 4px">{content}</td>'.format(content=item, align=align))
+        html.append('</tr>')
+    html.append('</table>')
+
+    html.append('</body></html>')
+    return ''.join(html)
+
+def write_html(filename, svg, bom_list):
+    with open(filename, 'w') as file:
+        file.write(html_report(svg, bom_list))
@@ -0,0 +1,113 @@
+import wv_colors
+from wv_helper import nested, awg_equiv
+
+# Labels are assembled as lists of fragments and joined once at the end,
+# so building a cable label is linear in the number of wires.
+
+def ferrule_label(n, color_mode):
+    infostring = '{type}{subtype} {color}'.format(type=n.type,
+                                                   subtype=', {}'.format(n.subtype) if n.subtype else '',
+                                                   color=wv_colors.translate_color(n.color, color_mode) if n.color else '')
+    infostring_l = infostring if n.ports_right else ''
+    infostring_r = infostring if n.ports_left else ''
+
+    return '''<
+
+                <TABLE BORDER="1" CELLBORDER="0" CELLSPACING="0" CELLPADDING="2"><TR>
+                <TD PORT="p1l"> {infostring_l} </TD>
+                {colorbar}
+                <TD PORT="p1r"> {infostring_r} </TD>
+                </TR></TABLE>
+
+
+                >'''.format(infostring_l=infostring_l,
+                            infostring_r=infostring_r,
+                            colorbar='<TD BGCOLOR="{}" BORDER="1" SIDES="LR" WIDTH="4"></TD>'.format(wv_colors.translate_color(n.color, 'HEX')) if n.color else '')
+
+def connector_attributes(n):
+    return [n.part_number, n.type,
+            n.subtype,
+            '{}-pin'.format(len(n.pinout)) if n.show_pincount else '']
+
+def connector_label(n):
+    # a = attributes
+    a = connector_attributes(n)
+    # p = pinout
+    p = [[],[],[]]
+    for i, x in enumerate(n.pinout, 1):
+        if n.hide_disconnected_pins and not n.visible_pins.get(i, False):
+            continue
+        p[1].append(x)
+        if n.ports_left:
+            p[0].append('<p{portno}l>{portno}'.format(portno=i))
+        if n.ports_right:
+            p[2].append('<p{portno}r>{portno}'.format(portno=i))
+    # l = label
+    l = [n.name if n.show_name else '', a, p, n.notes]
+    return nested(l)
+
+def cable_attributes(c):
+    a = [c.part_number,
+         '{}x'.format(len(c.colors)) if c.show_wirecount else '',
+         '{} {}{}'.format(c.gauge, c.gauge_unit, ' ({} AWG)'.format(awg_equiv(c.gauge)) if c.gauge_unit == 'mm\u00B2' and c.show_equiv else '') if c.gauge else '', # TODO: show equiv
+         '+ S' if c.shield else '',
+         '{} m'.format(c.length) if c.length > 0 else '']
+    return list(filter(None, a))
+
+def cable_label(c, color_mode, wire_ins=None, wire_outs=None):
+    # wire_ins/wire_outs map wire numbers (and 's' for the shield) to the
+    # endpoint strings shown left/right of each wire
+    wire_ins = wire_ins or {}
+    wire_outs = wire_outs or {}
+    # a = attributes
+    a = cable_attributes(c)
+
+    html = []
+    html.append('<table border="0" cellspacing="0" cellpadding="0"><tr><td>') # main table
+
+    html.append('<table border="0" cellspacing="0" cellpadding="3" cellborder="1">') # name+attributes table
+    if c.show_name:
+        html.append('<tr><td colspan="{colspan}">{name}</td></tr>'.format(colspan=len(a), name=c.name))
+    html.append('<tr>') # attribute row
+    for attrib in a:
+        html.append('<td>{attrib}</td>'.format(attrib=attrib))
+    html.append('</tr>') # attribute row
+    html.append('</table></td></tr>') # name+attributes table
+
+    html.append('<tr><td>&nbsp;</td></tr>') # spacer between attributes and wires
+
+    html.append('<tr><td><table border="0" cellspacing="0" cellborder="0">') # conductor table
+
+    for i, x in enumerate(c.colors,1):
+        p = []
+        p.append(wire_ins.get(i, ''))
+        p.append(wv_colors.translate_color(x, color_mode))
+        p.append(wire_outs.get(i, ''))
+        html.append('<tr>')
+        for bla in p:
+            html.append('<td>{}</td>'.format(bla))
+        html.append('</tr>')
+        bgcolor = wv_colors.translate_color(x, 'hex')
+        html.append('<tr><td colspan="{colspan}" cellpadding="0" height="6" bgcolor="{bgcolor}" border="2" sides="tb" port="{port}"></td></tr>'.format(colspan=len(p), bgcolor=bgcolor if bgcolor != '' else '#ffffff', port='w{}'.format(i)))
+
+    if c.shield:
+        p = [wire_ins.get('s', ''), 'Shield', wire_outs.get('s', '')]
+        html.append('<tr><td>&nbsp;</td></tr>') # spacer
+        html.append('<tr>')
+        for bla in p:
+            html.append('<td>{}</td>'.format(bla))
+        html.append('</tr>')
+        html.append('<tr><td colspan="{colspan}" cellpadding="0" height="6" border="2" sides="b" port="{port}"></td></tr>'.format(colspan=len(p), port='ws'))
+
+    html.append('<tr><td>&nbsp;</td></tr>') # spacer at the end
+
+    html.append('</table>') # conductor table
+
+    html.append('</td></tr>')  # main table
+    if c.notes:
+        html.append('<tr><td cellpadding="3">{}</td></tr>'.format(c.notes)) # notes table
+        html.append('<tr><td>&nbsp;</td></tr>') # spacer at the end
+
+    html.append('</table>')  # main table
+
+    return ''.join(html)
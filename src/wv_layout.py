@@ -0,0 +1,352 @@
+from dataclasses import dataclass, field
+from html import escape
+from typing import Any, Dict, List
+
+import wv_colors
+from wv_labels import connector_attributes, cable_attributes
+
+# Native layout engine: every WireViz diagram is a sequence of columns
+# (connectors, cables, connectors, ...), so instead of Graphviz's general
+# layered layout, nodes are assigned to columns by the longest path from the
+# left (after reversing the edges that close a cycle, as dot does), ordered
+# within their column by the barycenter of their neighbours, stacked, and
+# written directly as SVG.
+
+FONT = 'arial'
+FONT_SIZE = 14
+CHAR_WIDTH = 7.5 # average glyph width at FONT_SIZE
+PAD = 6 # horizontal text padding inside a cell
+ROW = 22 # height of a text row
+BAR = 6 # height of a wire color bar
+COLUMN_GAP = 144 # matches ranksep=2 (inches) of the Graphviz layout
+NODE_GAP = 24 # matches nodesep=0.33
+MARGIN = 8
+SWEEPS = 4 # barycenter passes (left to right and back)
+
+@dataclass
+class Box:
+    # a node in local coordinates; x, y are set when the columns are placed
+    name: str
+    width: float = 0
+    height: float = 0
+    body: List[str] = field(default_factory=list)
+    ports: Dict[Any, float] = field(default_factory=dict) # (port, 'l' or 'r') -> y offset
+    x: float = 0
+    y: float = 0
+
+def text_width(text):
+    return len(str(text)) * CHAR_WIDTH + 2 * PAD
+
+def svg_text(x, y, text, anchor='middle'):
+    return '<text x="{:.1f}" y="{:.1f}" text-anchor="{}">{}</text>'.format(x, y + ROW / 2 + FONT_SIZE * 0.35, anchor, escape(str(text)))
+
+def svg_line(x1, y1, x2, y2):
+    return '<line x1="{:.1f}" y1="{:.1f}" x2="{:.1f}" y2="{:.1f}" stroke="#000000"/>'.format(x1, y1, x2, y2)
+
+def svg_rect(x, y, width, height, fill='none', stroke='#000000', dashed=False):
+    return '<rect x="{:.1f}" y="{:.1f}" width="{:.1f}" height="{:.1f}" fill="{}" stroke="{}"{}/>'.format(
+        x, y, width, height, fill, stroke, ' stroke-dasharray="5,2"' if dashed else '')
+
+def cell_row(box, y, cells, width):
+    # one row of cells spread over the full width, each cell sized in proportion to its text
+    total = sum(text_width(c) for c in cells)
+    x = 0
+    for i, c in enumerate(cells):
+        w = width * text_width(c) / total
+        box.body.append(svg_text(x + w / 2, y, c))
+        if i > 0:
+            box.body.append(svg_line(x, y, x, y + ROW))
+        x += w
+
+def connector_box(n):
+    box = Box(n.name)
+    rows = []
+    if n.show_name:
+        rows.append([n.name])
+    a = [x for x in connector_attributes(n) if x]
+    if a:
+        rows.append(a)
+    pins = [(i, x) for i, x in enumerate(n.pinout, 1) if not (n.hide_disconnected_pins and not n.visible_pins.get(i, False))]
+
+    number_width = text_width(max((i for i, _ in pins), default=0))
+    label_width = max([text_width(x) for _, x in pins] + [text_width('')])
+    pins_width = label_width + number_width * (n.ports_left + n.ports_right)
+    box.width = max([pins_width] + [sum(text_width(c) for c in r) for r in rows] + [text_width(n.notes or '')])
+    label_width += box.width - pins_width # extra width goes to the pin labels
+
+    y = 0
+    for r in rows:
+        cell_row(box, y, r, box.width)
+        y += ROW
+        box.body.append(svg_line(0, y, box.width, y))
+    for i, x in pins:
+        cx = 0
+        if n.ports_left:
+            box.body.append(svg_text(cx + number_width / 2, y, i))
+            box.ports[(i, 'l')] = y + ROW / 2
+            cx += number_width
+            box.body.append(svg_line(cx, y, cx, y + ROW))
+        box.body.append(svg_text(cx + label_width / 2, y, x))
+        cx += label_width
+        if n.ports_right:
+            box.body.append(svg_line(cx, y, cx, y + ROW))
+            box.body.append(svg_text(cx + number_width / 2, y, i))
+            box.ports[(i, 'r')] = y + ROW / 2
+        y += ROW
+        box.body.append(svg_line(0, y, box.width, y))
+    if n.notes:
+        box.body.append(svg_text(box.width / 2, y, n.notes))
+        y += ROW
+    box.height = max(y, ROW)
+    box.body.append(svg_rect(0, 0, box.width, box.height))
+    return box
+
+def ferrule_box(n, color_mode):
+    box = Box(n.name)
+    info = ' '.join(filter(None, [n.type, n.subtype, wv_colors.translate_color(n.color, color_mode) if n.color else '']))
+    box.width = text_width(info) + BAR
+    box.height = ROW
+    x = text_width(info) if n.ports_right else 0 # the color bar faces the connected cable
+    box.body.append(svg_text(text_width(info) / 2 + (0 if n.ports_right else BAR), 0, info))
+    if n.color:
+        box.body.append(svg_rect(x, 0, BAR, ROW, fill=wv_colors.translate_color(n.color, 'HEX')))
+    box.body.append(svg_rect(0, 0, box.width, box.height))
+    box.ports[(None, 'l')] = box.ports[(None, 'r')] = ROW / 2
+    return box
+
+def cable_box(c, color_mode, wire_ins, wire_outs):
+    box = Box(c.name)
+    a = cable_attributes(c)
+    wires = [(i, wv_colors.translate_color(x, color_mode), wv_colors.translate_color(x, 'hex') or '#ffffff') for i, x in enumerate(c.colors, 1)]
+    if c.shield:
+        wires.append(('s', 'Shield', None))
+
+    side_width = max([text_width(v) for v in list(wire_ins.values()) + list(wire_outs.values())] + [text_width('')])
+    name_width = max(text_width(name) for _, name, _ in wires) if wires else text_width('')
+    box.width = max(2 * side_width + name_width, sum(text_width(x) for x in a), text_width(c.name), text_width(c.notes or ''))
+    side_width = (box.width - name_width) / 2
+
+    y = 0
+    rows = ([[c.name]] if c.show_name else []) + ([a] if a else [])
+    for r in rows:
+        cell_row(box, y, r, box.width)
+        y += ROW
+    if rows:
+        box.body.append(svg_rect(0, 0, box.width, y)) # name+attributes table
+    if len(rows) == 2:
+        box.body.append(svg_line(0, ROW, box.width, ROW))
+    y += ROW # spacer between attributes and wires
+    for i, name, bgcolor in wires:
+        box.body.append(svg_text(side_width / 2, y, wire_ins.get(i, '')))
+        box.body.append(svg_text(box.width / 2, y, name))
+        box.body.append(svg_text(box.width - side_width / 2, y, wire_outs.get(i, '')))
+        y += ROW
+        if bgcolor is None: # shield
+            box.body.append(svg_line(0, y + BAR / 2, box.width, y + BAR / 2))
+        else:
+            box.body.append(svg_rect(0, y, box.width, BAR, fill=bgcolor))
+        box.ports[(i, 'l')] = box.ports[(i, 'r')] = y + BAR / 2
+        y += BAR
+    y += ROW # spacer at the end
+    if c.notes:
+        box.body.append(svg_text(box.width / 2, y, c.notes))
+        y += ROW
+    box.height = y
+    box.body.append(svg_rect(0, 0, box.width, box.height, dashed=c.category == 'bundle'))
+    return box
+
+def edge_colors(c, via_port):
+    # stroke colors from the outside in, like the '#000000:color:#000000' edges of the Graphviz output
+    if isinstance(via_port, int):
+        return ['#000000', wv_colors.color_hex.get(c.colors[via_port-1], '#ffffff')]
+    return ['#000000'] # shield
+
+def back_edges(names, succs):
+    # edges that close a cycle, found by a depth-first search in definition order, as dot does;
+    # e.g. a cable that loops back into the connector it starts from
+    state = {} # name -> 1 while on the search path, 2 when done
+    back = set()
+    for root in names:
+        if root in state:
+            continue
+        state[root] = 1
+        stack = [(root, iter(succs[root]))]
+        while stack:
+            name, children = stack[-1]
+            for s in children:
+                if state.get(s) == 1:
+                    back.add((name, s))
+                elif s not in state:
+                    state[s] = 1
+                    stack.append((s, iter(succs[s])))
+                    break
+            else:
+                state[name] = 2
+                stack.pop()
+    return back
+
+def ranks(names, succs):
+    # column of every node: longest path from a node without predecessors (Kahn's algorithm);
+    # back edges are reversed first, so every node gets a column and the cables on a cycle
+    # are placed right of the connector the cycle starts from
+    back = back_edges(names, succs)
+    forward = {name: set() for name in names}
+    for name in names:
+        for s in succs[name]:
+            if (name, s) in back:
+                forward[s].add(name)
+            else:
+                forward[name].add(s)
+    rank = {name: 0 for name in names}
+    indegree = {name: 0 for name in names}
+    for name in names:
+        for s in forward[name]:
+            indegree[s] += 1
+    queue = [name for name in names if indegree[name] == 0]
+    while queue:
+        name = queue.pop()
+        for s in forward[name]:
+            rank[s] = max(rank[s], rank[name] + 1)
+            indegree[s] -= 1
+            if indegree[s] == 0:
+                queue.append(s)
+    return rank
+
+def order_columns(columns, succs, preds):
+    # barycenter heuristic: sort each column by the mean position of its neighbours
+    # in the column before (forward pass) or after (backward pass)
+    position = {name: i for column in columns for i, name in enumerate(column)}
+
+    def sweep(column, neighbours):
+        def barycenter(name):
+            p = [position[x] for x in neighbours[name]]
+            return sum(p) / len(p) if p else position[name]
+        column.sort(key=barycenter)
+        for i, name in enumerate(column):
+            position[name] = i
+
+    for _ in range(SWEEPS):
+        for column in columns[1:]:
+            sweep(column, preds)
+        for column in reversed(columns[:-1]):
+            sweep(column, succs)
+    return columns
+
+def check_port(box, port):
+    # a connection to an undefined pin or wire would otherwise fail when the edge is drawn
+    if port not in box.ports:
+        raise Exception('{}:{} not found'.format(box.name, port[0]))
+
+def layout(harness):
+    # returns (boxes by name, edges, loops, width, height)
+    harness.assign_port_sides()
+    boxes = {}
+    for k, n in harness.connectors.items():
+        boxes[k] = ferrule_box(n, harness.color_mode) if n.category == 'ferrule' else connector_box(n)
+
+    succs = {name: [] for name in list(harness.connectors) + list(harness.cables)}
+    preds = {name: [] for name in succs}
+    edges = []
+    for k, c in harness.cables.items():
+        wire_ins = {}
+        wire_outs = {}
+        wires = set(range(1, c.wirecount + 1)) | ({'s'} if c.shield else set())
+        for x in c.connections:
+            if x.via_port not in wires:
+                raise Exception('{}:{} not found'.format(k, x.via_port))
+            colors = edge_colors(c, x.via_port)
+            if x.from_port is not None:
+                from_ferrule = harness.connectors[x.from_name].category == 'ferrule'
+                edges.append((x.from_name, (None if from_ferrule else x.from_port, 'r'), k, (x.via_port, 'l'), colors))
+                wire_ins.setdefault(x.via_port, '' if from_ferrule else '{}:{}'.format(x.from_name, x.from_port))
+                succs[x.from_name].append(k)
+                preds[k].append(x.from_name)
+            if x.to_port is not None:
+                to_ferrule = harness.connectors[x.to_name].category == 'ferrule'
+                edges.append((k, (x.via_port, 'r'), x.to_name, (None if to_ferrule else x.to_port, 'l'), colors))
+                wire_outs.setdefault(x.via_port, '' if to_ferrule else '{}:{}'.format(x.to_name, x.to_port))
+                succs[k].append(x.to_name)
+                preds[x.to_name].append(k)
+        boxes[k] = cable_box(c, harness.color_mode, wire_ins, wire_outs)
+
+    for from_name, from_port, to_name, to_port, _ in edges:
+        check_port(boxes[from_name], from_port)
+        check_port(boxes[to_name], to_port)
+
+    rank = ranks(list(succs), succs)
+    columns = [[] for _ in range(max(rank.values(), default=-1) + 1)]
+    for name in succs: # definition order is the starting order
+        columns[rank[name]].append(name)
+    order_columns(columns, succs, preds)
+
+    # place the columns left to right, each centered vertically
+    heights = [sum(boxes[name].height for name in column) + NODE_GAP * (len(column) - 1) for column in columns]
+    height = max(heights, default=0)
+    x = MARGIN
+    for column, column_height in zip(columns, heights):
+        y = MARGIN + (height - column_height) / 2
+        width = max(boxes[name].width for name in column)
+        for name in column:
+            box = boxes[name]
+            box.x = x + (width - box.width) / 2
+            box.y = y
+            y += box.height + NODE_GAP
+        x += width + COLUMN_GAP
+
+    loops = []
+    for k, n in harness.connectors.items():
+        if n.loops:
+            if n.ports_left:
+                side = 'l'
+            elif n.ports_right:
+                side = 'r'
+            else:
+                raise Exception('No side for loops')
+            for a, b in n.loops:
+                check_port(boxes[k], (a, side))
+                check_port(boxes[k], (b, side))
+                loops.append((k, (a, side), (b, side)))
+
+    return boxes, edges, loops, x - COLUMN_GAP + MARGIN, height + 2 * MARGIN
+
+def port_point(box, port):
+    _, side = port
+    return (box.x if side == 'l' else box.x + box.width), box.y + box.ports[port]
+
+def svg_path(d, colors):
+    # multi-color edge: each inner stroke is drawn narrower on top of the previous one
+    width = 2 * len(colors)
+    paths = []
+    for color in colors:
+        paths.append('<path d="{}" fill="none" stroke="{}" stroke-width="{}"/>'.format(d, color, width))
+        width -= 2
+    return ''.join(paths)
+
+def render_svg(harness):
+    # SVG document (str) of the harness, laid out without Graphviz
+    boxes, edges, loops, width, height = layout(harness)
+    svg = []
+    svg.append('<?xml version="1.0" encoding="UTF-8" standalone="no"?>\n')
+    svg.append('<!-- Generated by WireViz (native layout) -->\n')
+    svg.append('<svg xmlns="http://www.w3.org/2000/svg" width="{w:.0f}pt" height="{h:.0f}pt" viewBox="0 0 {w:.1f} {h:.1f}">\n'.format(w=width, h=height))
+    svg.append('<g font-family="{}" font-size="{}">\n'.format(FONT, FONT_SIZE))
+    svg.append(svg_rect(0, 0, width, height, fill='white', stroke='none'))
+    for box in boxes.values():
+        svg.append('<g id="{}" transform="translate({:.1f},{:.1f})">'.format(escape(box.name), box.x, box.y))
+        svg.append(svg_rect(0, 0, box.width, box.height, fill='white', stroke='none'))
+        svg.extend(box.body)
+        svg.append('</g>\n')
+    for from_name, from_port, to_name, to_port, colors in edges:
+        x1, y1 = port_point(boxes[from_name], from_port)
+        x2, y2 = port_point(boxes[to_name], to_port)
+        dx = max((x2 - x1) / 2, COLUMN_GAP / 2) # a reversed wire on a cycle curves out of both boxes
+        d = 'M{:.1f},{:.1f} C{:.1f},{:.1f} {:.1f},{:.1f} {:.1f},{:.1f}'.format(x1, y1, x1 + dx, y1, x2 - dx, y2, x2, y2)
+        svg.append(svg_path(d, colors) + '\n')
+    for name, from_port, to_port in loops:
+        x1, y1 = port_point(boxes[name], from_port)
+        x2, y2 = port_point(boxes[name], to_port)
+        bulge = -40 if from_port[1] == 'l' else 40
+        d = 'M{:.1f},{:.1f} C{:.1f},{:.1f} {:.1f},{:.1f} {:.1f},{:.1f}'.format(x1, y1, x1 + bulge, y1, x2 + bulge, y2, x2, y2)
+        svg.append(svg_path(d, ['#000000', '#ffffff']) + '\n')
+    svg.append('</g>\n</svg>\n')
+    return ''.join(svg)
@@ -0,0 +1,46 @@
+import os
+import time
+from contextlib import contextmanager
+
+class Profiler:
+    # collects wall/CPU time per processing stage plus arbitrary metrics (DOT size, node count, ...)
+
+    def __init__(self):
+        self.stages = []
+        self.metrics = {}
+
+    @contextmanager
+    def stage(self, name):
+        wall = time.perf_counter()
+        cpu = time.process_time()
+        children = os.times()
+        try:
+            yield
+        finally:
+            children_end = os.times()
+            self.stages.append({'name': name,
+                                'wall': time.perf_counter() - wall,
+                                'cpu': time.process_time() - cpu,
+                                # CPU time of subprocesses (dot) that finished during this stage
+                                'subprocess_cpu': (children_end.children_user - children.children_user) + (children_end.children_system - children.children_system)})
+
+    def split_stage(self, name, wall, cpu):
+        # splits the last stage: it keeps the given wall and CPU time (which must be part of it),
+        # the remainder becomes a new stage called name, inserted before it
+        last = self.stages[-1]
+        self.stages.insert(-1, {'name': name,
+                                'wall': last['wall'] - wall,
+                                'cpu': last['cpu'] - cpu,
+                                'subprocess_cpu': last['subprocess_cpu']})
+        last.update(wall=wall, cpu=cpu, subprocess_cpu=0.0)
+
+    def record(self, key, value):
+        self.metrics[key] = value
+
+    def report(self):
+        report = dict(self.metrics)
+        report['stages'] = list(self.stages)
+        report['wall'] = sum(s['wall'] for s in self.stages)
+        report['cpu'] = sum(s['cpu'] for s in self.stages)
+        report['subprocess_cpu'] = sum(s['subprocess_cpu'] for s in self.stages)
+        return report
@@ -0,0 +1,65 @@
+import yaml
+
+# Streaming: the document is walked event by event, and only one top-level
+# section (or one entry of the connections list) is materialized at a time.
+# libyaml's C parser is an order of magnitude faster than the pure-Python one, but it only
+# produces events here; nodes are composed by the Python Composer.
+# yaml.cyaml is only importable when the _yaml extension is present and matches
+LOADERS = {}
+if yaml.__with_libyaml__:
+    class CStreamLoader(yaml.cyaml.CParser, yaml.composer.Composer, yaml.constructor.SafeConstructor, yaml.resolver.Resolver):
+
+        def __init__(self, stream):
+            yaml.cyaml.CParser.__init__(self, stream)
+            yaml.composer.Composer.__init__(self)
+            yaml.constructor.SafeConstructor.__init__(self)
+            yaml.resolver.Resolver.__init__(self)
+
+    LOADERS['libyaml'] = CStreamLoader
+LOADERS['python'] = yaml.SafeLoader
+
+def select_loader(preferred=None):
+    # returns (name, loader class) as used by iter_sections();
+    # falls back to the first available loader if the preferred one is not available
+    if preferred in LOADERS:
+        return preferred, LOADERS[preferred]
+    name = next(iter(LOADERS))
+    return name, LOADERS[name]
+
+def iter_sections(stream, preferred=None, streamed=('connections',)):
+    # yields (key, value) for every top-level key of the document;
+    # for keys in streamed whose value is a list, value is an iterator that
+    # constructs one list entry at a time and must be consumed before the next section is read
+    _, Loader = select_loader(preferred)
+    loader = Loader(stream)
+    try:
+        loader.get_event() # stream start
+        if loader.check_event(yaml.StreamEndEvent): # empty document
+            return
+        loader.get_event() # document start
+        if not loader.check_event(yaml.MappingStartEvent):
+            raise Exception('Input must be a mapping of sections')
+        loader.get_event()
+        while not loader.check_event(yaml.MappingEndEvent):
+            key = loader.construct_document(loader.compose_node(None, None))
+            event = loader.peek_event()
+            if key in streamed and isinstance(event, yaml.SequenceStartEvent) and event.anchor is None:
+                loader.get_event()
+                yield key, _iter_sequence(loader)
+                while not loader.check_event(yaml.SequenceEndEvent): # skip entries the consumer did not read
+                    loader.compose_node(None, None)
+                loader.get_event()
+            else:
+                yield key, loader.construct_document(loader.compose_node(None, None))
+        loader.get_event() # mapping end
+        loader.get_event() # document end
+        if not loader.check_event(yaml.StreamEndEvent):
+            event = loader.get_event()
+            raise yaml.composer.ComposerError('expected a single document in the stream',
+                                              None, 'but found another document', event.start_mark)
+    finally:
+        loader.dispose()
+
+def _iter_sequence(loader):
+    while not loader.check_event(yaml.SequenceEndEvent):
+        yield loader.construct_document(loader.compose_node(None, None))